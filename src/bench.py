@@ -0,0 +1,153 @@
+import sys
+import json
+import subprocess
+from os import chdir, getcwd, makedirs
+from os.path import join, abspath, dirname
+from shutil import copy, copytree
+from tempfile import TemporaryDirectory
+from contextlib import redirect_stdout
+from io import StringIO
+from time import perf_counter
+from argparse import ArgumentParser
+
+from corpus import make_corpus, make_list_corpus, write_corpus
+from block_markdown_handler import markdown_to_html_node, markdown_to_blocks, block_to_block_type, classify_block, render_block, block_to_html_node, configure_block_cache, BlockType, BLOCK_CACHE_SIZE
+from htmlnode import rewrite_urls
+from renderer import HtmlRenderer
+from inline_markdown_handler import text_to_textnodes
+import main as site
+
+# Benchmark suite: micro benchmarks for the hot functions and an end to end build, all over a
+# deterministic synthetic corpus. Results can be saved as a baseline and later runs compared
+# against it, the run fails if anything got slower than the allowed tolerance.
+# Run with: ./bench.sh [--save baseline.json] [--compare baseline.json]
+
+REPO_ROOT = dirname(dirname(abspath(__file__)))
+
+def main():
+    parser = ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--pages", type=int, default=200, help="pages in the synthetic corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the fastest one counts")
+    parser.add_argument("--save", metavar="FILE", help="write the results to FILE as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a saved baseline and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline, 0.2 is 20%%")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.pages, args.repeat)
+    for name, seconds in results.items():
+        print(f"{name:<32} {seconds * 1000:>10.3f} ms")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"pages": args.pages, "results": results}, file, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline["pages"] != args.pages:
+            print(f"Baseline was made with {baseline['pages']} pages, run with --pages {baseline['pages']} to compare")
+            sys.exit(2)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+def run_benchmarks(pages, repeat):
+    corpus = make_corpus(pages)
+    blocks = [block for markdown in corpus for block in markdown_to_blocks(markdown)]
+    paragraphs = [block.replace("\n", " ") for block in blocks if block_to_block_type(block) == BlockType.PARAGRAPH]
+    trees = [markdown_to_html_node(markdown) for markdown in corpus]
+    # long lists and quotes are where classifying a block costs the most
+    list_corpus = make_list_corpus(max(1, pages // 10), 50)
+    list_blocks = [block for markdown in list_corpus for block in markdown_to_blocks(markdown)]
+
+    results = {}
+    results["markdown_to_blocks"] = best_of(repeat, lambda: [markdown_to_blocks(markdown) for markdown in corpus])
+    results["classify_block"] = best_of(repeat, lambda: [classify_block(block) for block in blocks])
+    results["classify_block (lists)"] = best_of(repeat, lambda: [classify_block(block) for block in list_blocks])
+    results["text_to_textnodes"] = best_of(repeat, lambda: [text_to_textnodes(text) for text in paragraphs])
+    results["markdown_to_html_node"] = best_of(repeat, lambda: [markdown_to_html_node(markdown) for markdown in corpus])
+    results["markdown_to_html_node (lists)"] = best_of(repeat, lambda: [markdown_to_html_node(markdown) for markdown in list_corpus])
+    results["ParentNode.to_html"] = best_of(repeat, lambda: [tree.to_html() for tree in trees])
+    # the two ways a build can turn blocks into html, through a tree or straight out
+    results["blocks to html (tree)"] = best_of(repeat, lambda: [rewrite_urls(block_to_html_node(block), "/").to_html() for block in blocks])
+    results["blocks to html (direct)"] = best_of(repeat, lambda: [render_direct(block) for block in blocks])
+    results.update(build_benchmarks(pages, repeat))
+    results.update(startup_benchmarks(repeat))
+    return results
+
+def render_direct(block):
+    renderer = HtmlRenderer()
+    render_block(block, renderer)
+    return renderer.html()
+
+def build_benchmarks(pages, repeat):
+    # a full build of the synthetic site in a scratch directory, then a rebuild where nothing changed
+    results = {}
+    cwd = getcwd()
+    with TemporaryDirectory() as directory:
+        write_corpus(join(directory, "content"), pages)
+        copy(join(REPO_ROOT, "template.html"), join(directory, "template.html"))
+        copytree(join(REPO_ROOT, "static"), join(directory, "static"))
+        makedirs(join(directory, "docs"))
+
+        # the build works with paths relative to the site root
+        chdir(directory)
+        try:
+            with redirect_stdout(StringIO()):
+                # the block cache lives as long as the process, without emptying it every run
+                # after the first would only measure cache hits
+                def cold_build():
+                    configure_block_cache(BLOCK_CACHE_SIZE)
+                    site.build_site("/")
+                results["build (full)"] = best_of(repeat, cold_build)
+                # what a build daemon or watch server does, with the blocks of the last build cached
+                results["build (full, warm block cache)"] = best_of(repeat, lambda: site.build_site("/"))
+                results["build (incremental, no-op)"] = best_of(repeat, lambda: site.build_site("/", incremental=True))
+        finally:
+            chdir(cwd)
+    return results
+
+def startup_benchmarks(repeat):
+    # what a CI job building a small site pays on every run: a fresh interpreter importing the
+    # build, and one building a single page from start to finish
+    source_dir = join(REPO_ROOT, "src")
+    results = {}
+    with TemporaryDirectory() as directory:
+        makedirs(join(directory, "content"))
+        makedirs(join(directory, "static"))
+        copy(join(REPO_ROOT, "template.html"), join(directory, "template.html"))
+        with open(join(directory, "content", "index.md"), "w") as file:
+            file.write("# Home\n\nOne page.\n")
+
+        def run(*arguments):
+            subprocess.run([sys.executable, *arguments], cwd=directory, check=True, stdout=subprocess.DEVNULL)
+
+        results["startup (import main)"] = best_of(repeat, lambda: run("-c", f"import sys; sys.path.insert(0, {source_dir!r}); import main"))
+        results["startup (one page build)"] = best_of(repeat, lambda: run(join(source_dir, "main.py")))
+    return results
+
+def best_of(repeat, function):
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return min(times)
+
+def compare(results, baseline, tolerance):
+    print(f"\n{'benchmark':<32} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        change = seconds / baseline[name] - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<32} {baseline[name] * 1000:>12.3f} {seconds * 1000:>10.3f} {change:>+8.0%}{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from timeit import repeat
+
+from block_markdown_handler import BlockType, classify_block, block_to_html_node, markdown_to_blocks
+import block_markdown_handler
+from corpus import make_list_corpus
+
+# Compares the single pass block classifier with the old one, which split every block up front,
+# split every line again for each of the quote and list checks, and then split the block once
+# more to render it. Timed on its own and as part of rendering the blocks, where inline parsing
+# makes up most of the time. Run with: python3 src/bench_blocks.py
+
+def split_block_to_block_type(block):
+    # the way block_to_block_type used to work
+    split = block.split(" ")
+    lines = block.split("\n")
+    if split[0] in ["#", "##", "###", "####", "#####", "######"] and len(split) > 1:
+        return BlockType.HEADING
+    if block[0:3] == "```" and block[-3:] == "```":
+        return BlockType.CODE
+    if all(line.split(" ")[0] == ">" for line in lines):
+        return BlockType.QUOTE
+    if all(line.split(" ")[0] == "-" for line in lines):
+        return BlockType.U_LIST
+    if all(line.split(" ")[0] == f"{i + 1}." for i, line in enumerate(lines)):
+        return BlockType.O_LIST
+    return BlockType.PARAGRAPH
+
+def split_classify_block(block):
+    # the old classifier plus the splitting block_to_html_node used to do on top of it
+    block_type = split_block_to_block_type(block)
+    match block_type:
+        case BlockType.HEADING:
+            split = block.split(" ", 1)
+            return block_type, (len(split[0]), split[1])
+        case BlockType.CODE:
+            return block_type, block[3:-3].lstrip()
+        case BlockType.QUOTE:
+            return block_type, "\n".join(line.replace(">", "").strip() for line in block.split("\n")).strip()
+        case BlockType.U_LIST | BlockType.O_LIST:
+            return block_type, [line.split(" ", 1)[1] for line in block.split("\n")]
+        case BlockType.PARAGRAPH:
+            return block_type, block.replace("\n", " ")
+
+def split_block_to_html_node(block):
+    # block_to_html_node, with the old classifier swapped in
+    block_markdown_handler.classify_block = split_classify_block
+    try:
+        return block_to_html_node(block)
+    finally:
+        block_markdown_handler.classify_block = classify_block
+
+def best_time(function, blocks, number):
+    return min(repeat(lambda: [function(block) for block in blocks], number=number, repeat=5)) / number
+
+def main():
+    print(f"{'items per list':>14} {'blocks':>7} {'':>10} {'split (ms)':>12} {'single pass (ms)':>18} {'speedup':>9}")
+    for items in [5, 50, 500]:
+        blocks = [block for markdown in make_list_corpus(20, items) for block in markdown_to_blocks(markdown)]
+        # both have to agree before the timings mean anything
+        for block in blocks:
+            if split_classify_block(block) != classify_block(block):
+                raise Exception(f"single pass classifier disagrees with the old one on {block!r}")
+
+        number = max(1, 200 // items)
+        timings = [
+            ("classify", best_time(split_classify_block, blocks, number * 10), best_time(classify_block, blocks, number * 10)),
+            ("render", best_time(split_block_to_html_node, blocks, number), best_time(block_to_html_node, blocks, number)),
+        ]
+        for name, split, single in timings:
+            print(f"{items:>14} {len(blocks):>7} {name:>10} {split * 1000:>12.3f} {single * 1000:>18.3f} {split / single:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
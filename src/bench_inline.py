@@ -0,0 +1,41 @@
+from timeit import repeat
+
+from textnode import TextNode, TextType
+from inline_markdown_handler import split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+
+# Compares the single pass inline scanner with the old chain of split_nodes_* passes
+# on link heavy paragraphs. Run with: python3 src/bench_inline.py
+
+def chained_text_to_textnodes(text):
+    # the way text_to_textnodes used to work, one full pass per node type
+    nodes = split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+def link_paragraph(links):
+    parts = []
+    for i in range(links):
+        parts.append(f"Read **part {i}** of the [guide number {i}](https://example.com/guides/{i}) or `skip` it.")
+    return " ".join(parts)
+
+def best_time(function, text, number):
+    return min(repeat(lambda: function(text), number=number, repeat=5)) / number
+
+def main():
+    print(f"{'links':>8} {'chained (ms)':>14} {'single pass (ms)':>18} {'speedup':>9}")
+    for links in [10, 100, 1000, 5000]:
+        text = link_paragraph(links)
+        # both have to agree before the timings mean anything
+        if chained_text_to_textnodes(text) != text_to_textnodes(text):
+            raise Exception("single pass scanner disagrees with the chained passes")
+
+        number = max(1, 2000 // links)
+        chained = best_time(chained_text_to_textnodes, text, number)
+        single = best_time(text_to_textnodes, text, number)
+        print(f"{links:>8} {chained * 1000:>14.3f} {single * 1000:>18.3f} {chained / single:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
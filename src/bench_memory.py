@@ -0,0 +1,91 @@
+import sys
+import json
+import subprocess
+import tracemalloc
+from argparse import ArgumentParser
+from resource import getrusage, RUSAGE_SELF
+
+import textnode
+import htmlnode
+import inline_markdown_handler
+import block_markdown_handler
+import renderer
+from corpus import make_corpus
+
+# Measures the memory taken by the node trees of a synthetic corpus, once with the slotted
+# node classes and once with equivalent classes that have a per instance __dict__.
+# Each variant runs in its own process so the peak RSS numbers don't mix.
+# Run with: python3 src/bench_memory.py --pages 2000
+
+def main():
+    parser = ArgumentParser(description="Compare node memory use with and without __slots__")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--variant", choices=["slots", "dict"], help="run a single variant and print its numbers as json")
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(measure(args.pages, args.variant)))
+        return
+
+    results = {}
+    for variant in ["dict", "slots"]:
+        output = subprocess.run([sys.executable, __file__, "--pages", str(args.pages), "--variant", variant], capture_output=True, text=True, check=True)
+        results[variant] = json.loads(output.stdout)
+
+    print(f"{args.pages} pages, {results['slots']['nodes']} nodes")
+    print(f"{'':>8} {'traced peak (MB)':>18} {'peak RSS (MB)':>15}")
+    for variant in ["dict", "slots"]:
+        print(f"{variant:>8} {results[variant]['traced'] / 2**20:>18.1f} {results[variant]['rss'] / 2**10:>15.1f}")
+    print(f"traced peak is {1 - results['slots']['traced'] / results['dict']['traced']:.0%} lower with slots")
+
+def measure(pages, variant):
+    corpus = make_corpus(pages)
+    if variant == "dict":
+        use_dict_nodes()
+
+    # keep every tree alive, like a build that holds its whole site model in memory
+    tracemalloc.start()
+    trees = [block_markdown_handler.markdown_to_html_node(markdown) for markdown in corpus]
+    _, traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"nodes": count_nodes(trees), "traced": traced, "rss": getrusage(RUSAGE_SELF).ru_maxrss}
+
+def count_nodes(trees):
+    count = 0
+    stack = list(trees)
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+def use_dict_nodes():
+    # rebuild the node classes without __slots__ and swap them in everywhere they're imported,
+    # the block level nodes are built by the renderer
+    text_node = without_slots(textnode.TextNode, ())
+    html_node = without_slots(htmlnode.HTMLNode, ())
+    # the subclasses' super() is tied to the original classes, so they get their own __init__
+    leaf_node = without_slots(htmlnode.LeafNode, (html_node,), lambda self, tag, value, props=None: html_node.__init__(self, tag, value, None, props))
+    parent_node = without_slots(htmlnode.ParentNode, (html_node,), lambda self, tag, children, props=None: html_node.__init__(self, tag, None, children, props))
+
+    replacements = {"TextNode": text_node, "HTMLNode": html_node, "LeafNode": leaf_node, "ParentNode": parent_node}
+    for module in [textnode, htmlnode, inline_markdown_handler, renderer, block_markdown_handler]:
+        for name, cls in replacements.items():
+            if hasattr(module, name):
+                setattr(module, name, cls)
+
+def without_slots(cls, bases, init=None):
+    namespace = {}
+    for name, value in cls.__dict__.items():
+        # the slot descriptors and __slots__ itself are what we're getting rid of
+        if name in ("__slots__", "__dict__", "__weakref__") or name in getattr(cls, "__slots__", ()):
+            continue
+        namespace[name] = value
+    if init is not None:
+        namespace["__init__"] = init
+    return type(cls.__name__, bases or cls.__bases__, namespace)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
+import re
 from enum import Enum
+from functools import lru_cache
+from os.path import join, dirname, normpath
 
-from textnode import TextNode, TextType
-from htmlnode import LeafNode, ParentNode, text_node_to_html_node
+from textnode import TextType
+from htmlnode import LeafNode, ParentNode
 from inline_markdown_handler import text_to_textnodes
+from search_index import tokenize
+from renderer import TreeRenderer, HtmlRenderer
+
+# bump this whenever the html produced for the same markdown changes, it invalidates rendered
+# pages that were cached on disk by earlier builds
+PARSER_VERSION = "1"
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -14,123 +23,223 @@ class BlockType(Enum):
 
 
 
+# a line like {{> snippets/license.md }} pulls in another markdown file, relative to this one
+INCLUDE_PATTERN = re.compile(r"^\{\{>\s*([^\s}]+)\s*\}\}$")
+MAX_INCLUDE_DEPTH = 10
+
+# Reads markdown one line at a time from any iterable of lines (an open file works) and yields
+# its blocks lazily, so a large file never has to be in memory as a whole.
+# The title is picked up on the same pass and is available once the blocks have been read.
+# Includes are only followed when the reader knows the directory of the file it reads,
+# the files they pulled in end up in dependencies.
+class BlockReader:
+    def __init__(self, lines, directory=None):
+        self.lines = lines
+        self.directory = directory
+        self.title = None
+        self.dependencies = []
+
+    def __iter__(self):
+        block = []
+        for line in self.read_lines(self.lines, self.directory, 0):
+            if self.title is None and line.strip().startswith("# "):
+                self.title = line.replace("#", "").strip()
+
+            # an empty line ends the block, just like splitting the whole text on "\n\n"
+            if line == "" or line == "\n":
+                if block:
+                    yield from finish_block(block)
+                    block = []
+            else:
+                block.append(line.strip())
+
+        if block:
+            yield from finish_block(block)
+
+    def read_lines(self, lines, directory, depth):
+        if directory is None:
+            yield from lines
+            return
+
+        for line in lines:
+            match = INCLUDE_PATTERN.match(line.strip())
+            if match is None:
+                yield line
+                continue
+
+            if depth >= MAX_INCLUDE_DEPTH:
+                raise Exception(f"includes nested more than {MAX_INCLUDE_DEPTH} deep, is one including itself?")
+            path = normpath(join(directory, match.group(1)))
+            self.dependencies.append(path)
+            with open(path) as file:
+                # the include always stands as its own blocks
+                yield ""
+                yield from self.read_lines(file, dirname(path), depth + 1)
+                yield ""
+
+def finish_block(lines):
+    # take out any leading/trailing empty lines, and only keep the block if anything is left
+    block = "\n".join(lines).strip()
+    if block:
+        yield block
+
 def markdown_to_blocks(markdown):
-    blocks = []
-    split = markdown.split("\n\n")
+    return list(BlockReader(markdown.split("\n")))
 
-    # treat each block
-    for block in split:
-        # take out any leading/trailing whitespaces and newlines
-        new_block = block.strip()
+# a heading is one to six #s and a space, whatever follows is the heading text
+HEADING_PATTERN = re.compile(r"(#{1,6}) (.*)", re.DOTALL)
 
-        # split each block into lines and strip those
-        lines = new_block.split("\n")
-        rejoin = []
-        for line in lines:
-            rejoin.append(line.strip())
-        new_block = "\n".join(rejoin)
+def classify_block(block):
+    # works out the type of a block in one pass over its lines and returns it together with
+    # the parts the renderer needs: (level, text) for a heading, the body of a code block,
+    # the text of a quote, the items of a list, or the text of a paragraph
+    heading = HEADING_PATTERN.match(block)
+    if heading:
+        return BlockType.HEADING, (len(heading.group(1)), heading.group(2))
 
-        # if the block isn't empty, append it
-        if new_block:
-            blocks.append(new_block)
+    if block[0:3] == "```" and block[-3:] == "```":
+        return BlockType.CODE, block[3:-3].lstrip()
 
-    return blocks
+    # every line of a quote or list starts with the same marker, an ordered list counts up
+    lines = block.split("\n")
+    marker = lines[0].partition(" ")[0]
+    if marker in (">", "-", "1."):
+        parts = []
+        for number, line in enumerate(lines, 1):
+            start, _, rest = line.partition(" ")
+            if start != (marker if marker != "1." else f"{number}."):
+                break
+            parts.append(rest)
+        else:
+            if marker == ">":
+                # any > in the text goes as well, not only the markers
+                return BlockType.QUOTE, "\n".join(part.replace(">", "").strip() for part in parts).strip()
+            if marker == "-":
+                return BlockType.U_LIST, parts
+            return BlockType.O_LIST, parts
+
+    return BlockType.PARAGRAPH, block.replace("\n", " ")
 
 def block_to_block_type(block):
-    split = block.split(" ")
-    lines = block.split("\n")
-    # check if is header
-    headers = ["#", "##", "###", "####", "#####", "######"]
-    if split[0] in headers:
-        # if there is any text after
-        if len(split) > 1:
-            return BlockType.HEADING
-
-    # check if is code
-    if block[0:3] == "```" and block[-3:] == "```":
-        return BlockType.CODE
-    
-    # check if is quote
-    if all(line.split(" ")[0] == ">" for line in lines):
-        return BlockType.QUOTE
-    
-    # check if is unordered list
-    if all(line.split(" ")[0] == "-" for line in lines):
-        return BlockType.U_LIST
-    
-    ordered_list = True
-    # check if is ordered list
-    for i in range(0, len(lines)):
-        start = lines[i].split(" ")[0]
-        if start != f"{i+1}.":
-            ordered_list = False
-
-    if ordered_list:
-        return BlockType.O_LIST
-    
-    # else 
-    return BlockType.PARAGRAPH
+    return classify_block(block)[0]
 
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+    return blocks_to_html_node(BlockReader(markdown.split("\n")))
 
+def blocks_to_html_node(blocks):
+    # blocks can be any iterable, like a BlockReader streaming them out of a file
     div = ParentNode("div", [])
 
-
-
     for block in blocks:
-        match block_to_block_type(block):
-            case BlockType.HEADING:
-                headers = ["#", "##", "###", "####", "#####", "######"]
-                if any(block.startswith(header) for header in headers):
-                    split = block.split(" ", 1)
-                    value = len(split[0])
-
-                    div.children.append(ParentNode(f"h{value}", text_to_children(split[1])))
-            case BlockType.CODE:
-                text = block[3:-3].lstrip()
-                div.children.append(ParentNode("pre", [text_node_to_html_node(TextNode(text, TextType.CODE))]))
-            case BlockType.QUOTE:
-                lines = block.split("\n")
-                clean_string = ""
-                for line in lines:
-                    # take out the >             
-                    clean_string += line.replace(">", "").strip() + "\n"
-
-                # take off the last newline
-                clean_string = clean_string.strip()
-                div.children.append(ParentNode("blockquote", text_to_children(clean_string)))
-            case BlockType.U_LIST:
-                div.children.append(ParentNode("ul", create_list_leaves(block)))
-            case BlockType.O_LIST:
-                div.children.append(ParentNode("ol", create_list_leaves(block)))
-            case BlockType.PARAGRAPH:
-                clean_text = block.replace("\n", " ")
-                div.children.append(ParentNode("p", text_to_children(clean_text)))
-            case _:
-                raise Exception("Block not recognized")
+        div.children.append(block_to_html_node(block))
 
     return div
 
-def text_to_children(text):
-    result = []
-
-    text_nodes = text_to_textnodes(text)
-    for node in text_nodes:
-        result.append(text_node_to_html_node(node))
-
-    return result
-
-def create_list_leaves(text):
-    leaves = []
-    items = text.split("\n")
-
-    for item in items:
-        split = item.split(" ", 1)
-        children = text_to_children(split[1])
-        leaves.append(ParentNode("li", children))
-
-    return leaves
+def render_block(block, renderer):
+    # the parser's half of rendering, what comes out is up to the renderer (see renderer.py)
+    block_type, parsed = classify_block(block)
+    match block_type:
+        case BlockType.HEADING:
+            level, text = parsed
+            return renderer.heading(level, text)
+        case BlockType.CODE:
+            return renderer.code(parsed)
+        case BlockType.QUOTE:
+            return renderer.quote(parsed)
+        case BlockType.U_LIST:
+            return renderer.unordered_list(parsed)
+        case BlockType.O_LIST:
+            return renderer.ordered_list(parsed)
+        case BlockType.PARAGRAPH:
+            return renderer.paragraph(parsed)
+        case _:
+            raise Exception("Block not recognized")
+
+# the tree renderer keeps no state, one does for everything
+tree_renderer = TreeRenderer()
+
+def block_to_html_node(block):
+    return render_block(block, tree_renderer)
+
+# Shared footers, license paragraphs and the like show up on many pages. Those blocks are only
+# parsed once, later pages get the html that was already serialized for them.
+# The type of a block follows from its text, so the text (plus the base path that went into
+# its urls and whether it was minified) is all the key needs. The sizes of the site's images
+# go into the html too, the cache starts over whenever they change.
+BLOCK_CACHE_SIZE = 4096
+
+# url -> size and srcset of every image in static/, see images.py
+image_table = {}
+
+def configure_block_cache(maxsize, images=None):
+    global cached_block_html, image_table
+    cached_block_html = lru_cache(maxsize=maxsize)(block_html)
+    if images is not None:
+        image_table = images
+
+def configure_images(images):
+    global image_table
+    if images != image_table:
+        image_table = images
+        cached_block_html.cache_clear()
+
+def block_cache_info():
+    return cached_block_html.cache_info()
+
+def block_html(block, base_path, minify=False):
+    # the html of a block along with the search terms in its text and the images it shows.
+    # written directly, a tree would only be built to be serialized right away
+    renderer = HtmlRenderer(base_path, minify, image_table)
+    render_block(block, renderer)
+    return renderer.html(), tokenize(" ".join(renderer.text)), tuple(renderer.image_urls)
+
+cached_block_html = lru_cache(maxsize=BLOCK_CACHE_SIZE)(block_html)
+
+def blocks_to_cached_html_node(blocks, base_path="/", terms=None, minify=False, images=None):
+    # like blocks_to_html_node, but with every block already serialized, urls included, so the
+    # node must not be serialized with minify again. the search terms of every block are added
+    # to terms and the urls of its images to images, if given
+    children = []
+    for block in blocks:
+        html, block_terms, block_images = cached_block_html(block, base_path, minify)
+        if terms is not None:
+            terms.update(block_terms)
+        if images is not None:
+            images.update(block_images)
+        children.append(LeafNode(None, html))
+    return ParentNode("div", children)
+
+# excerpts are cut at a word boundary once they are this long
+EXCERPT_LENGTH = 200
+
+def collect_excerpt(blocks, excerpt, length=EXCERPT_LENGTH):
+    # passes the blocks through untouched, and on the way adds the plain text of the first
+    # paragraphs to excerpt, until there is enough of it. paragraphs that are nothing but links,
+    # like a "back home" link, don't say anything about the page and are left out
+    for block in blocks:
+        if sum(len(part) for part in excerpt) < length:
+            block_type, text = classify_block(block)
+            if block_type == BlockType.PARAGRAPH:
+                nodes = text_to_textnodes(text)
+                if any(node.text_type not in (TextType.LINK, TextType.IMAGE) and node.text.strip() for node in nodes):
+                    excerpt.append(nodes_text(nodes))
+        yield block
+
+def make_excerpt(parts, length=EXCERPT_LENGTH):
+    text = " ".join(" ".join(parts).split())
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(" ", 1)[0] + "…"
+
+def nodes_text(nodes):
+    # inline markdown without its markup, link text stays but images don't
+    parts = []
+    for node in nodes:
+        if node.text_type == TextType.LINK:
+            parts.append(nodes_text(text_to_textnodes(node.text)))
+        elif node.text_type != TextType.IMAGE:
+            parts.append(node.text)
+    return "".join(parts)
 
 def extract_title(markdown):
     split = markdown.split("\n")
@@ -0,0 +1,58 @@
+import gzip
+import lzma
+from os import replace, stat
+
+# Precompressed copies of the text outputs, written next to them as index.html.gz and so on,
+# for servers and CDNs that can send those instead of compressing every response themselves.
+# A copy is an output built from the file it compresses, so the manifest knows when it's up to
+# date and only new or changed files are compressed again. Small files are left alone, the
+# headers would eat most of the savings.
+
+# the formats that can be asked for, gz is what every server understands
+FORMATS = {
+    "gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+    "xz": lambda data: lzma.compress(data, preset=6),
+}
+
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".xml", ".svg", ".txt")
+
+# files smaller than this aren't worth compressing
+MIN_SIZE = 1024
+
+def compress_outputs(manifest, formats, min_size=MIN_SIZE):
+    jobs = []
+    unchanged = 0
+    small = 0
+    for path in sorted(manifest.new_outputs):
+        if not path.endswith(COMPRESSIBLE):
+            continue
+        if stat(path).st_size < min_size:
+            small += 1
+            continue
+
+        for extension in formats:
+            compressed_path = f"{path}.{extension}"
+            settings = {"format": extension}
+            if manifest.is_dirty(compressed_path, settings):
+                jobs.append((path, extension))
+            else:
+                unchanged += 1
+
+    # zlib and lzma let go of the GIL while they work, so threads compress in parallel
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor() as pool:
+        list(pool.map(lambda job: compress_file(*job), jobs))
+    for path, extension in jobs:
+        manifest.record(f"{path}.{extension}", [path], {"format": extension})
+
+    print(f"Compressed files: {len(jobs)} written, {unchanged} unchanged, {small} below {min_size} bytes")
+
+def compress_file(path, extension):
+    with open(path, "rb") as file:
+        data = FORMATS[extension](file.read())
+
+    # never leave a half written copy behind for the server to find
+    compressed_path = f"{path}.{extension}"
+    with open(compressed_path + ".tmp", "wb") as file:
+        file.write(data)
+    replace(compressed_path + ".tmp", compressed_path)
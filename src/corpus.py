@@ -0,0 +1,96 @@
+from random import Random
+from os import makedirs
+from os.path import join
+
+# Generates synthetic markdown pages for the benchmarks. The same seed always gives the same
+# pages, so numbers from different runs (and machines) are comparable.
+
+WORDS = [
+    "the", "ring", "of", "power", "elves", "went", "west", "over", "sea", "and", "a", "hobbit",
+    "walked", "into", "mordor", "with", "his", "friend", "sam", "gandalf", "grey", "white",
+    "council", "rivendell", "shire", "road", "goes", "ever", "on", "mountain", "dwarves", "gold",
+    "dragon", "lonely", "lake", "town", "river", "forest", "old", "tom", "bombadil", "song",
+]
+
+def make_corpus(pages, seed=0):
+    rng = Random(seed)
+    return [make_page(rng, index) for index in range(pages)]
+
+def make_page(rng, index):
+    blocks = [f"# Page {index}: {sentence(rng, 4).rstrip('.')}"]
+    for _ in range(rng.randint(8, 20)):
+        kind = rng.random()
+        if kind < 0.4:
+            blocks.append(paragraph(rng))
+        elif kind < 0.5:
+            blocks.append(f"{'#' * rng.randint(2, 4)} {sentence(rng, 5).rstrip('.')}")
+        elif kind < 0.65:
+            blocks.append("\n".join(f"- {inline(rng, 8)}" for _ in range(rng.randint(2, 8))))
+        elif kind < 0.75:
+            blocks.append("\n".join(f"{i + 1}. {inline(rng, 8)}" for i in range(rng.randint(2, 8))))
+        elif kind < 0.85:
+            blocks.append("\n".join(f"> {sentence(rng, 10)}" for _ in range(rng.randint(1, 4))))
+        elif kind < 0.95:
+            lines = [f"{word(rng)} = {rng.randint(0, 999)}" for _ in range(rng.randint(2, 10))]
+            blocks.append("```\n" + "\n".join(lines) + "\n```")
+        else:
+            blocks.append(f"![{sentence(rng, 3).rstrip('.')}](/images/{word(rng)}.png)")
+    return "\n\n".join(blocks) + "\n"
+
+def make_list_corpus(pages, items, seed=0):
+    # pages that are mostly long lists and quotes, the blocks that have one marker per line
+    rng = Random(seed)
+    return [make_list_page(rng, index, items) for index in range(pages)]
+
+def make_list_page(rng, index, items):
+    blocks = [f"# Lists {index}"]
+    for _ in range(rng.randint(4, 8)):
+        kind = rng.random()
+        if kind < 0.45:
+            blocks.append("\n".join(f"- {inline(rng, 6)}" for _ in range(items)))
+        elif kind < 0.9:
+            blocks.append("\n".join(f"{i + 1}. {inline(rng, 6)}" for i in range(items)))
+        else:
+            blocks.append("\n".join(f"> {sentence(rng, 8)}" for _ in range(items)))
+        # a list that breaks off halfway ends up as a paragraph
+        if rng.random() < 0.2:
+            blocks.append("\n".join(f"- {word(rng)}" for _ in range(items // 2)) + "\nnot an item")
+    return "\n\n".join(blocks) + "\n"
+
+def paragraph(rng):
+    return " ".join(inline(rng, 14) for _ in range(rng.randint(1, 5)))
+
+def inline(rng, length):
+    # plain text with the occasional bit of inline markdown mixed in
+    parts = []
+    for _ in range(length):
+        kind = rng.random()
+        if kind < 0.06:
+            parts.append(f"**{word(rng)} {word(rng)}**")
+        elif kind < 0.1:
+            parts.append(f"_{word(rng)}_")
+        elif kind < 0.13:
+            parts.append(f"`{word(rng)}()`")
+        elif kind < 0.18:
+            parts.append(f"[{word(rng)} {word(rng)}](https://example.com/{word(rng)}/{rng.randint(0, 99)})")
+        else:
+            parts.append(word(rng))
+    return " ".join(parts)
+
+def sentence(rng, length):
+    return " ".join(word(rng) for _ in range(length)).capitalize() + "."
+
+def word(rng):
+    return rng.choice(WORDS)
+
+def write_corpus(directory, pages, seed=0):
+    # lay the pages out like a real site, a few sections with one directory per page
+    paths = []
+    for index, markdown in enumerate(make_corpus(pages, seed)):
+        page_dir = join(directory, f"section{index // 100}", f"page{index}")
+        makedirs(page_dir, exist_ok=True)
+        path = join(page_dir, "index.md")
+        with open(path, "w") as file:
+            file.write(markdown)
+        paths.append(path)
+    return paths
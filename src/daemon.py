@@ -0,0 +1,117 @@
+import sys
+import json
+import socketserver
+from signal import signal, SIGTERM
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from io import StringIO
+from os import remove
+from os.path import exists
+
+from main import build, add_build_arguments, build_config, load_manifest
+
+# A build process that stays up between builds, so a rebuild doesn't pay for starting Python,
+# importing everything and reading the manifest again. It keeps the last build's manifest (the
+# hashes of every input, the dependency graph and the page metadata), the block cache, the
+# compiled templates and the image sizes in memory, and builds whenever it's asked to:
+#   curl -X POST http://localhost:8889/build
+#   curl -X POST --unix-socket .build.sock http://localhost/build
+# The answer lists the outputs the build wrote or removed. Builds run one at a time, a request
+# arriving during a build waits for it.
+
+BUILD_PATH = "/build"
+
+def main():
+    parser = ArgumentParser(description="Keep the site model in memory and rebuild whenever asked to over http")
+    add_build_arguments(parser)
+    parser.add_argument("--port", type=int, default=8889, help="localhost port to listen on (default 8889)")
+    parser.add_argument("--socket", metavar="PATH", help="listen on a unix socket at PATH instead of a port")
+    args = parser.parse_args()
+
+    daemon = BuildDaemon(build_config(parser, args))
+    # the first build warms everything up, and brings the public dir up to date
+    result = daemon.build()
+    if "error" in result:
+        print(result["log"], end="")
+        print(f"Build failed: {result['error']}")
+    else:
+        print(f"Built {len(result['changed'])} outputs in {result['milliseconds']}ms")
+
+    if args.socket:
+        if exists(args.socket):
+            remove(args.socket)
+        server = UnixHTTPServer(args.socket, daemon.handler)
+        print(f"Listening on {args.socket}")
+    else:
+        server = HTTPServer(("localhost", args.port), daemon.handler)
+        print(f"Listening on http://localhost:{args.port}{BUILD_PATH}")
+    # hooks and service managers stop processes with SIGTERM, it cleans up the same as ctrl-c
+    signal(SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and exists(args.socket):
+            remove(args.socket)
+
+class BuildDaemon:
+    def __init__(self, config):
+        self.config = config
+        self.config.incremental = True
+        self.manifest = load_manifest(incremental=True)
+        self.builds = 0
+
+    def build(self):
+        # the build's own progress output would only fill up the daemon's log, it's kept for errors
+        log = StringIO()
+        try:
+            with redirect_stdout(log):
+                result = build(self.config, self.manifest)
+        except Exception as e:
+            # what a failed build left in memory is half done, start again from the last saved manifest
+            self.manifest = load_manifest(incremental=True)
+            return {"error": str(e), "log": log.getvalue()}
+
+        self.manifest = result.manifest.next()
+        self.builds += 1
+        return {"changed": result.changed, "milliseconds": round(result.seconds * 1000)}
+
+    def handler(self, *args, **kwargs):
+        return BuildRequestHandler(self, *args, **kwargs)
+
+class BuildRequestHandler(BaseHTTPRequestHandler):
+    def __init__(self, daemon, *args, **kwargs):
+        self.daemon = daemon
+        super().__init__(*args, **kwargs)
+
+    def do_POST(self):
+        if self.path != BUILD_PATH:
+            self.send_json(404, {"error": f"unknown path {self.path}, builds are started with POST {BUILD_PATH}"})
+            return
+        result = self.daemon.build()
+        self.send_json(500 if "error" in result else 200, result)
+
+    def do_GET(self):
+        self.send_json(200, {"builds": self.daemon.builds, "outputs": len(self.daemon.manifest.outputs)})
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix socket"
+
+# HTTPServer only knows tcp, this is the same request handling over a unix socket
+class UnixHTTPServer(socketserver.UnixStreamServer):
+    pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+from os.path import normpath
+from argparse import ArgumentParser
+
+# The dependency graph of a build: for every output, the exact input files it was built from
+# (with the hash each one had at the time), and the reverse, every output depending on an input.
+# It's built from the outputs recorded in the manifest.
+class DependencyGraph:
+    def __init__(self, outputs):
+        self.inputs = {}
+        self.dependents_of = {}
+        for output, entry in outputs.items():
+            self.inputs[output] = entry["inputs"]
+            for input_path, digest in entry["inputs"].items():
+                self.dependents_of.setdefault(input_path, {})[output] = digest
+
+    def dependents(self, path):
+        return sorted(self.dependents_of.get(normpath(path), {}))
+
+    def affected(self, hash_file):
+        # every output built from an input that doesn't hash the same anymore. each input is
+        # only hashed once, however many outputs depend on it
+        affected = set()
+        for input_path, outputs in self.dependents_of.items():
+            digest = hash_file(input_path)
+            for output, recorded in outputs.items():
+                if recorded != digest:
+                    affected.add(output)
+        return affected
+
+def main():
+    # imported here so the graph itself doesn't depend on the build
+    from main import manifest_path
+    from manifest import Manifest
+
+    parser = ArgumentParser(description="Query the dependency graph recorded by the last build")
+    parser.add_argument("query", choices=["dependents", "inputs"], help="dependents: outputs built from PATH, inputs: files the output PATH was built from")
+    parser.add_argument("path")
+    parser.add_argument("--manifest", default=manifest_path)
+    args = parser.parse_args()
+
+    manifest = Manifest(args.manifest)
+    if not manifest.load():
+        print(f"No build manifest at {args.manifest}, run a build first")
+        return 1
+
+    graph = DependencyGraph(manifest.outputs)
+    if args.query == "dependents":
+        results = graph.dependents(args.path)
+    else:
+        results = sorted(graph.inputs.get(normpath(args.path), {}))
+
+    for result in results:
+        print(result)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+from fnmatch import fnmatchcase
+from os import scandir, cpu_count
+from os.path import join, realpath
+
+# Finds the source files of a build. Every directory is read once with scandir, which knows
+# whether an entry is a file or a directory without a stat call of its own, and the stat that
+# is needed is cached on the entry. Only regular files and directories are taken, sockets,
+# fifos and broken links are passed over, and a symlinked directory is only followed once.
+#
+# Files can be filtered with globs. A glob without a slash matches names at any depth, one with
+# a slash matches the path from the root ("drafts/*" is everything under drafts/, * crosses
+# slashes). Excluded directories aren't read at all. With include globs given, only files
+# matching one of them are found. A .buildignore file holds more exclude globs, one per line,
+# for the directory it's in and everything below it, paths in it are relative to that directory.
+#
+# Directories are read a level at a time, and wide levels are spread over a pool of threads,
+# scandir lets go of the GIL while it waits on the disk.
+
+IGNORE_FILE = ".buildignore"
+
+# threads only pay off once a level has this many directories, reading one takes microseconds.
+# with the directories in the page cache the walk is cpu bound, so more threads than cores
+# only add switching
+PARALLEL_DIRECTORIES = 16
+WORKERS = min(8, cpu_count() or 1)
+
+# A file that was found: its path, its path relative to the root with / between the parts,
+# and the scandir entry, whose stat is cached
+class SourceFile:
+    __slots__ = ("path", "relative", "entry")
+
+    def __init__(self, path, relative, entry):
+        self.path = path
+        self.relative = relative
+        self.entry = entry
+
+    def stat(self):
+        return self.entry.stat()
+
+    def __repr__(self):
+        return f"SourceFile({self.path})"
+
+def discover(root, include=(), exclude=(), ignore_file=IGNORE_FILE, workers=WORKERS):
+    # every file under root that the rules let through, in the order a sorted depth first walk
+    # would find them
+    files = []
+    seen = set()
+    level = [(root, "", [("", pattern) for pattern in exclude])]
+    pool = None
+    try:
+        while level:
+            def read(directories):
+                return [scan(*directory, include, ignore_file, seen) for directory in directories]
+            if workers > 1 and len(level) >= PARALLEL_DIRECTORIES:
+                if pool is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    pool = ThreadPoolExecutor(workers)
+                # a batch of directories per thread, one task each would cost more than reading them
+                batches = pool.map(read, [level[start::workers] for start in range(workers)])
+            else:
+                batches = [read(level)]
+
+            level = []
+            for batch in batches:
+                for found, directories in batch:
+                    files.extend(found)
+                    level.extend(directories)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    files.sort(key=lambda file: file.relative.split("/"))
+    return files
+
+def scan(directory, relative, excludes, include, ignore_file, seen):
+    # the files of one directory, and its subdirectories with the excludes that apply in them
+    with scandir(directory) as entries:
+        entries = list(entries)
+    if any(entry.name == ignore_file for entry in entries):
+        excludes = excludes + read_ignore_file(join(directory, ignore_file), relative)
+
+    files = []
+    directories = []
+    for entry in entries:
+        path = relative + entry.name
+        if entry.name == ignore_file or matches(excludes, path, entry.name):
+            continue
+        if entry.is_dir():
+            if entry.is_symlink():
+                target = realpath(entry.path)
+                if target in seen:
+                    continue
+                seen.add(target)
+            directories.append((entry.path, path + "/", excludes))
+        elif entry.is_file():
+            if include and not matches([("", pattern) for pattern in include], path, entry.name):
+                continue
+            files.append(SourceFile(entry.path, path, entry))
+    return files, directories
+
+def read_ignore_file(path, relative):
+    patterns = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                patterns.append((relative, line.lstrip("/")))
+    return patterns
+
+def matches(patterns, path, name):
+    # patterns are (directory they're relative to, glob) pairs
+    for base, pattern in patterns:
+        if "/" in pattern:
+            if path.startswith(base) and fnmatchcase(path[len(base):], pattern):
+                return True
+        elif fnmatchcase(name, pattern):
+            return True
+    return False
@@ -0,0 +1,12 @@
+from os import makedirs
+from os.path import dirname
+
+# Helpers shared by the tests
+
+def write(path, text):
+    # writes a text file, along with any directories on its path that don't exist yet
+    directory = dirname(path)
+    if directory:
+        makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
@@ -1,60 +1,137 @@
+import re
+
 from textnode import TextType
 
+# with minify on, runs of whitespace in text become one space, except inside these tags
+PRESERVE_WHITESPACE = ("pre", "code", "textarea", "script", "style")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# pushed on the serializer's stack to mark the end of a tag whose whitespace is preserved
+LEAVE_PRESERVED = object()
+
 # An HTMLNode without a tag will just render as raw text
 # An HTMLNode without a value will be assumed to have children
 # An HTMLNode without children will be assumed to have a value
 # An HTMLNode without props simply won't have any attributes
+# Nodes use slots rather than a per instance __dict__, a page easily has thousands of them
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag = None, value = None, children = None, props = None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, minify=False):
+        return "".join(self.iter_html(minify))
+
+    def iter_html(self, minify=False):
         raise NotImplementedError("function not implemented in child class")
-    
+
+    def write_html(self, fp, minify=False):
+        # stream the chunks straight into the file or buffer, the page never exists as one string
+        fp.writelines(self.iter_html(minify))
+
     def props_to_html(self):
         if self.props is None:
             return ""
-        result = ""
-        for attribute in self.props:
-            result += f' {attribute}="{self.props[attribute]}"'
-        return result
-    
+        return "".join(f' {attribute}="{value}"' for attribute, value in self.props.items())
+
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
-    
+
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props = None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def iter_html(self, minify=False):
         if (self.value == None):
             raise ValueError("leaf node must have a value")
 
+        value = self.value
+        if minify and self.tag not in PRESERVE_WHITESPACE:
+            value = collapse_whitespace(value)
+
         if (self.tag == None):
-            return self.value
+            yield value
         else:
-            return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
-        
+            yield f"<{self.tag}{self.props_to_html()}>"
+            yield value
+            yield f"</{self.tag}>"
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props = None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
-        if (self.tag == None):
-            raise ValueError("parent node must have a tag")
-        if (self.children == None or self.children == []):
-            raise ValueError("parent node must have at least 1 child")
-        
-        result = ""
-
-        for child in self.children:
-            result += child.to_html()
-        
-        return f"<{self.tag}{self.props_to_html()}>{result}</{self.tag}>"
-    
+    def iter_html(self, minify=False):
+        # walk the tree with an explicit stack instead of recursing, so deep nesting can't hit
+        # the recursion limit. Closing tags are pushed as plain strings to be yielded on the way back.
+        # preserved counts the <pre> and the like the walk is inside of, when minifying
+        stack = [self]
+        preserved = 0
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif node is LEAVE_PRESERVED:
+                preserved -= 1
+            elif isinstance(node, ParentNode):
+                if (node.tag == None):
+                    raise ValueError("parent node must have a tag")
+                if (node.children == None or node.children == []):
+                    raise ValueError("parent node must have at least 1 child")
+
+                yield f"<{node.tag}{node.props_to_html()}>"
+                if minify and node.tag in PRESERVE_WHITESPACE:
+                    preserved += 1
+                    stack.append(LEAVE_PRESERVED)
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield from node.iter_html(minify and not preserved)
+
+def collapse_whitespace(text):
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+def text_content(node):
+    # the text of a tree without any markup, leaf by leaf in document order
+    parts = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.children is not None:
+            stack.extend(reversed(current.children))
+        elif current.value:
+            parts.append(current.value)
+    return " ".join(parts)
+
+# attributes holding urls that have to follow the site's base path
+URL_ATTRIBUTES = ("href", "src")
+
+def rebase_url(url, base_path):
+    # only root relative urls move with the base path, "//host/..." points at another site
+    if url.startswith("/") and not url.startswith("//"):
+        return base_path + url[1:]
+    return url
+
+def rewrite_urls(node, base_path):
+    # walk the tree without recursion, deep documents shouldn't hit the recursion limit
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.props is not None:
+            for attribute in URL_ATTRIBUTES:
+                if attribute in current.props:
+                    current.props[attribute] = rebase_url(current.props[attribute], base_path)
+        if current.children is not None:
+            stack.extend(current.children)
+    return node
+
 def text_node_to_html_node(node):
     match node.text_type:
         case TextType.TEXT:
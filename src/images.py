@@ -0,0 +1,140 @@
+import struct
+from os import cpu_count
+from os.path import relpath, splitext
+
+from htmlnode import rebase_url
+from png import SIGNATURE, CHANNELS, scale_png
+
+# Images in static/ and content/ are looked at once per build, before any page is rendered:
+#  - their width and height are read from the file header, so every <img> of the site gets
+#    width and height attributes (no layout shift while it loads) and loading="lazy"
+#  - with widths asked for, pngs also get smaller copies next to them, images/tom-480w.png,
+#    which pages offer through srcset so small screens don't download the full image
+# Sizes are kept in the manifest by content hash and copies are outputs like any other, so
+# an image is only opened again when it changed. Pages record the images they show as inputs.
+
+IMAGE_EXTENSIONS = (".png", ".gif", ".jpg", ".jpeg")
+
+# start of frame markers hold the size of a jpeg, c4, c8 and cc are other tables sharing the range
+JPEG_SIZE_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# markers without a length after them
+JPEG_BARE_MARKERS = {0x01, *range(0xD0, 0xD9)}
+
+def image_info(path):
+    # {"width", "height", "scalable"} from the header of a png, gif or jpeg, None for anything else
+    with open(path, "rb") as file:
+        head = file.read(32)
+        if head.startswith(SIGNATURE) and head[12:16] == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", head[16:29])
+            # only the pngs png.py can decode get smaller copies
+            return {"width": width, "height": height, "scalable": depth == 8 and color_type in CHANNELS and not interlace}
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            width, height = struct.unpack("<HH", head[6:10])
+            return {"width": width, "height": height, "scalable": False}
+        if head[:2] == b"\xff\xd8":
+            file.seek(2)
+            size = jpeg_size(file)
+            if size is not None:
+                return {"width": size[0], "height": size[1], "scalable": False}
+    return None
+
+def jpeg_size(file):
+    # walk the segments up to the first start of frame, skipping their contents
+    while True:
+        byte = file.read(1)
+        while byte and byte != b"\xff":
+            byte = file.read(1)
+        # any number of 0xff may pad a marker
+        while byte == b"\xff":
+            byte = file.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in JPEG_BARE_MARKERS:
+            continue
+        if marker in JPEG_SIZE_MARKERS:
+            # length, sample precision, then height before width
+            segment = file.read(7)
+            if len(segment) < 7:
+                return None
+            height, width = struct.unpack(">HH", segment[3:7])
+            return width, height
+        length = file.read(2)
+        if len(length) < 2:
+            return None
+        file.seek(struct.unpack(">H", length)[0] - 2, 1)
+
+def variant_path(path, width):
+    root, extension = splitext(path)
+    return f"{root}-{width}w{extension}"
+
+def process_images(files, public_dir, manifest, widths=()):
+    # files are the (source, destination) pairs of the static copy. returns the table pages are
+    # annotated from, url -> {"width", "height", "srcset": [[url, width], ...], "source"}
+    table = {}
+    work = []
+    for source_path, destination_path in files:
+        if not source_path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        info = manifest.derive(source_path, image_info)
+        if info is None:
+            continue
+
+        url = "/" + relpath(destination_path, public_dir)
+        srcset = []
+        copies = []
+        if info["scalable"]:
+            for width in sorted(set(widths)):
+                # copies are only ever smaller than the original
+                if width >= info["width"]:
+                    continue
+                path = variant_path(destination_path, width)
+                if manifest.is_dirty(path, {"width": width}):
+                    copies.append((path, width))
+                srcset.append([variant_path(url, width), width])
+        if copies:
+            work.append((source_path, copies))
+        if srcset:
+            srcset.append([url, info["width"]])
+        table[url] = {"width": info["width"], "height": info["height"], "srcset": srcset, "source": source_path}
+
+    if work:
+        from concurrent.futures import ProcessPoolExecutor
+        # decoding and scaling in pure python is slow, images are handed to parallel processes
+        # whole, so each is decoded once however many copies it needs
+        with ProcessPoolExecutor(max_workers=min(len(work), cpu_count())) as pool:
+            list(pool.map(scale_png, *zip(*work)))
+        for source_path, copies in work:
+            for path, width in copies:
+                print(f"Scaled {source_path} to {path}")
+                manifest.record(path, [source_path], {"width": width})
+
+    print(f"Images: {len(table)} found, {sum(len(copies) for _, copies in work)} copies scaled")
+    return table
+
+def annotate_images(node, table, base_path):
+    # adds the size, lazy loading and srcset of every known image in the tree, before its urls
+    # are rebased. returns the root relative urls of all images in it, known or not
+    urls = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.tag == "img" and current.props is not None:
+            url = current.props.get("src", "")
+            if url.startswith("/") and not url.startswith("//"):
+                urls.append(url)
+                info = table.get(url)
+                if info is not None:
+                    current.props.update(image_attributes(info, base_path))
+        if current.children is not None:
+            stack.extend(current.children)
+    return urls
+
+def image_attributes(info, base_path):
+    # the attributes an <img> of a known image gets, after its src and alt
+    attributes = {"width": str(info["width"]), "height": str(info["height"]), "loading": "lazy"}
+    if info["srcset"]:
+        attributes["srcset"] = ", ".join(f"{rebase_url(path, base_path)} {width}w" for path, width in info["srcset"])
+        # never let a browser pick a copy wider than the image is shown
+        attributes["sizes"] = f"(max-width: {info['width']}px) 100vw, {info['width']}px"
+    return attributes
@@ -111,12 +111,120 @@ def split_nodes_link(old_nodes):
 
     return new_nodes
 
+# the single pass scanner stops at any of these: a delimiter, or the start of an image or link
+INLINE_TOKEN_PATTERN = re.compile(r"\*\*|[_`]|!?\[")
+BRACKET_PATTERN = re.compile(r"[\[\]]")
+
+DELIMITERS = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+
 def text_to_textnodes(text):
-    # append returned nodes one by one
-    nodes = split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-
-    return nodes
\ No newline at end of file
+    # scan the text once from left to right instead of running a pass per node type.
+    # plain text is only copied out when the next bit of markup is found
+    nodes = []
+    plain_start = 0
+    position = 0
+    find = ClosingFinder(text)
+
+    while True:
+        match = INLINE_TOKEN_PATTERN.search(text, position)
+        if match is None:
+            break
+
+        token = match.group()
+        start = match.start()
+
+        if token in DELIMITERS:
+            end = text.find(token, match.end())
+            if end == -1:
+                raise Exception(f"Text {text} contains invalid Markdown syntax, {token} is never closed")
+
+            if start > plain_start:
+                nodes.append(TextNode(text[plain_start:start], TextType.TEXT))
+            if end > match.end():
+                nodes.append(TextNode(text[match.end():end], DELIMITERS[token]))
+            plain_start = position = end + len(token)
+            continue
+
+        # an image or link, anything that doesn't parse as one is just text
+        if token == "![":
+            found = match_image(text, start, find)
+            text_type = TextType.IMAGE
+        else:
+            found = match_link(text, start, find)
+            text_type = TextType.LINK
+
+        if found is None:
+            position = match.end()
+            continue
+
+        if start > plain_start:
+            nodes.append(TextNode(text[plain_start:start], TextType.TEXT))
+        label, url, end = found
+        nodes.append(TextNode(label, text_type, url))
+        plain_start = position = end
+
+    if plain_start < len(text):
+        nodes.append(TextNode(text[plain_start:], TextType.TEXT))
+
+    return nodes
+
+# Finds the next ] or ) in a text, remembering what it found. An unclosed [ or ( can be
+# followed by any number of images and links that get to look for the same closing character,
+# searching the rest of the text again for every one of them would make the scan quadratic
+class ClosingFinder:
+    def __init__(self, text):
+        self.text = text
+        # character -> (searched from, found at), and where nothing is found from on
+        self.found = {}
+        self.none_from = {}
+
+    def __call__(self, character, start):
+        if start >= self.none_from.get(character, len(self.text) + 1):
+            return -1
+        searched = self.found.get(character)
+        if searched is not None and searched[0] <= start <= searched[1]:
+            return searched[1]
+
+        index = self.text.find(character, start)
+        if index == -1:
+            self.none_from[character] = start
+        else:
+            self.found[character] = (start, index)
+        return index
+
+def match_image(text, start, find):
+    # ![alt](url) at start, alt runs to the first ] and url to the first ) after it.
+    # returns (alt, url, end) or None
+    alt_end = find("]", start + 2)
+    if alt_end == -1 or not text.startswith("(", alt_end + 1):
+        return None
+    url_end = find(")", alt_end + 2)
+    if url_end == -1:
+        return None
+    return text[start + 2:alt_end], text[alt_end + 2:url_end], url_end + 1
+
+def match_link(text, start, find):
+    # [text](url) at start. the text can't hold brackets, other than those of the images in it,
+    # so image badges can be links. returns (text, url, end) or None
+    position = start + 1
+    while True:
+        bracket = BRACKET_PATTERN.search(text, position)
+        if bracket is None:
+            return None
+        index = bracket.start()
+        if text[index] == "]":
+            break
+        # a [ only belongs in the text as the start of an image
+        if index == position or text[index - 1] != "!":
+            return None
+        image = match_image(text, index - 1, find)
+        if image is None:
+            return None
+        position = image[2]
+
+    if not text.startswith("(", index + 1):
+        return None
+    url_end = find(")", index + 2)
+    if url_end == -1:
+        return None
+    return text[start + 1:index], text[index + 2:url_end], url_end + 1
@@ -1,89 +1,619 @@
-from textnode import TextNode, TextType
-from block_markdown_handler import markdown_to_html_node, extract_title
-from shutil import rmtree, copy
-from os.path import exists, join, dirname, isfile
-from os import listdir, mkdir, makedirs
-from sys import argv
+import block_markdown_handler
+import renderer
+from block_markdown_handler import BlockReader, blocks_to_html_node, blocks_to_cached_html_node, configure_block_cache, configure_images, block_cache_info, BLOCK_CACHE_SIZE, collect_excerpt, make_excerpt
+from manifest import Manifest
+from template import load_template
+from htmlnode import rewrite_urls, text_content
+from site_index import write_site_indexes
+from search_index import update_search_index, tokenize
+from compress import compress_outputs, FORMATS, MIN_SIZE
+from images import process_images, annotate_images
+from discovery import discover
+from shutil import rmtree, copy2
+from os.path import exists, join, dirname, isfile, normpath, relpath
+from os import listdir, mkdir, makedirs, remove, rmdir, cpu_count, stat, link as os_link
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from time import perf_counter
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+dir_path_templates = "./templates"
+manifest_path = "./.build_manifest.json"
 
-def main(): 
-    # get the basepath from argv
-    if len(argv) > 1:
-        base_path = argv[1]
+# content files matching this are snippets for includes, never pages or copied files
+SNIPPET_PATTERN = "_*"
 
-    # if this is the root call, delete the public dir
-    if exists(dir_path_public):
-        print("public dir found, deleting")
-        rmtree(dir_path_public)
+# pages in flight between two stages of the build pipeline, enough to hide slow disks
+PIPELINE_DEPTH = 16
+# bytes of source lines the pipeline reads at a time, at most PIPELINE_DEPTH chunks are read ahead
+READ_CHUNK_SIZE = 65536
+
+def main():
+    parser = ArgumentParser(description="Generate the static site from content/ and static/")
+    parser.add_argument("--incremental", action="store_true", help="only rebuild outputs whose inputs changed since the last build")
+    add_build_arguments(parser)
+    parser.add_argument("--profile", nargs="?", const="build_profile.json", metavar="REPORT", help="time every build phase per page and write a json report (default build_profile.json)")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest pages to list with --profile")
+    args = parser.parse_args()
+
+    config = build_config(parser, args)
+    config.incremental = args.incremental
+    config.profile = args.profile is not None
+    result = build(config)
+
+    render_cache = result.render_cache
+    if render_cache is not None:
+        print(f"Render cache: {render_cache.hits} hits, {render_cache.misses} misses, {result.evicted} pages evicted")
+
+    # with worker processes every worker has a cache of its own, only report the in-process one
+    info = block_cache_info()
+    if config.jobs == 1 and info.hits + info.misses > 0:
+        print(f"Block cache: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries used")
+
+    if result.profiler is not None:
+        result.profiler.write_report(args.profile)
+        result.profiler.print_summary(args.top)
+        print(f"\nProfile written to {args.profile}")
+
+# Everything a build can be told, with the same defaults as the command line. Paths are fixed,
+# the build runs relative to the site root.
+class BuildConfig:
+    def __init__(self, base_path="/", incremental=False, jobs=1, link=False, block_cache=BLOCK_CACHE_SIZE, cache_dir=None, cache_size=512, site_url=None, minify=False, compress=(), compress_min_size=MIN_SIZE, image_widths=(), profile=False, include=(), exclude=()):
+        self.base_path = base_path
+        self.incremental = incremental
+        self.jobs = jobs
+        self.link = link
+        self.block_cache = block_cache
+        self.cache_dir = cache_dir
+        # in MB
+        self.cache_size = cache_size
+        self.site_url = site_url
+        self.minify = minify
+        self.compress = compress
+        self.compress_min_size = compress_min_size
+        self.image_widths = image_widths
+        self.profile = profile
+        # globs picking the source files, see discovery.py
+        self.include = include
+        self.exclude = exclude
+
+# What a build did: the outputs it wrote or removed, how long it took, and the manifest it
+# recorded, which holds every output along with the metadata of the pages.
+# With the render cache or profiling on, those are kept here for their numbers.
+class BuildResult:
+    def __init__(self, changed, seconds, manifest, render_cache=None, evicted=0, profiler=None):
+        self.changed = changed
+        self.seconds = seconds
+        self.manifest = manifest
+        self.render_cache = render_cache
+        self.evicted = evicted
+        self.profiler = profiler
+
+def build(config, manifest=None):
+    # the entry point for tools building the site from python. a caller building again and
+    # again can pass the manifest of the last result to start from, see BuildDaemon
+    start = perf_counter()
+
+    # the block cache outlives single builds, it's only set up again when its size changes
+    if block_cache_info().maxsize != config.block_cache:
+        configure_block_cache(config.block_cache)
+
+    # only imported when asked for, most builds use neither
+    render_cache = None
+    if config.cache_dir is not None:
+        from render_cache import RenderCache
+        render_cache = RenderCache(config.cache_dir, config.cache_size * 2**20)
+    profiler = None
+    if config.profile:
+        from profiler import Profiler
+        profiler = Profiler()
+
+    if manifest is None:
+        manifest = load_manifest(config.incremental)
+
+    changed = build_site(
+        base_path=config.base_path,
+        incremental=config.incremental,
+        jobs=config.jobs,
+        profiler=profiler,
+        link=config.link,
+        render_cache=render_cache,
+        site_url=config.site_url,
+        compress=config.compress,
+        compress_min_size=config.compress_min_size,
+        minify=config.minify,
+        image_widths=config.image_widths,
+        manifest=manifest,
+        include=config.include,
+        exclude=config.exclude,
+    )
+    evicted = render_cache.evict() if render_cache is not None else 0
+    return BuildResult(changed, perf_counter() - start, manifest, render_cache, evicted, profiler)
+
+def add_build_arguments(parser):
+    # the options of a build, shared with the build daemon
+    parser.add_argument("base_path", nargs="?", default="/", help="path the site is served from, e.g. /static-site-gen/")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes rendering pages, 0 means one per CPU core")
+    parser.add_argument("--link", action="store_true", help="hardlink static files into the public dir instead of copying them")
+    parser.add_argument("--block-cache", type=int, default=BLOCK_CACHE_SIZE, metavar="SIZE", help=f"number of rendered blocks kept for reuse across pages, 0 disables the cache (default {BLOCK_CACHE_SIZE})")
+    parser.add_argument("--cache-dir", metavar="DIR", help="keep rendered pages in DIR and reuse them in later builds, the directory can be shared between CI runs")
+    parser.add_argument("--cache-size", type=int, default=512, metavar="MB", help="size cap of the render cache, least recently used pages are dropped first (default 512)")
+    parser.add_argument("--site-url", help="absolute url of the site, e.g. https://example.com, needed for sitemap.xml and the blog feed")
+    parser.add_argument("--minify", action="store_true", help="strip insignificant whitespace from the pages while they're serialized, <pre> and <code> are left alone")
+    parser.add_argument("--compress", nargs="?", const="gz", metavar="FORMATS", help=f"write precompressed copies of new or changed text outputs next to them, a comma separated list of {', '.join(FORMATS)} (default gz)")
+    parser.add_argument("--compress-min-size", type=int, default=MIN_SIZE, metavar="BYTES", help=f"don't compress files smaller than this (default {MIN_SIZE})")
+    parser.add_argument("--image-widths", metavar="WIDTHS", help="make smaller copies of the png images at these comma separated widths, e.g. 480,960, and offer them to browsers with srcset")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB", help="only build source files matching GLOB, can be given more than once. a glob without a slash matches file names, one with a slash paths within content/ and static/. the outputs of the other files are left as they are")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="leave out source files and directories matching GLOB, their outputs are left as they are. can be given more than once. .buildignore files hold globs for files that aren't part of the site at all, one per line")
+
+def build_config(parser, args):
+    # checks the arguments added by add_build_arguments and turns them into a BuildConfig
+    compress = args.compress.split(",") if args.compress else []
+    for extension in compress:
+        if extension not in FORMATS:
+            parser.error(f"unknown compression format {extension}, choose from {', '.join(FORMATS)}")
+    try:
+        image_widths = [int(width) for width in args.image_widths.split(",")] if args.image_widths else []
+    except ValueError:
+        parser.error(f"image widths must be whole numbers of pixels, got {args.image_widths}")
+    if any(width <= 0 for width in image_widths):
+        parser.error("image widths must be positive")
+
+    return BuildConfig(
+        base_path=args.base_path,
+        jobs=args.jobs or cpu_count(),
+        link=args.link,
+        block_cache=args.block_cache,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size,
+        site_url=args.site_url,
+        minify=args.minify,
+        compress=compress,
+        compress_min_size=args.compress_min_size,
+        image_widths=image_widths,
+        include=args.include,
+        exclude=args.exclude,
+    )
+
+def build_site(base_path="/", incremental=False, jobs=1, profiler=None, link=False, render_cache=None, site_url=None, compress=(), compress_min_size=MIN_SIZE, minify=False, image_widths=(), manifest=None, include=(), exclude=()):
+    if profiler is not None and jobs > 1:
+        # the timings live in this process, workers would take them with them
+        print("Profiling runs in a single process, ignoring --jobs")
+        jobs = 1
+    if profiler is not None and render_cache is not None:
+        # pages coming out of the cache would hide what rendering them costs
+        print("Profiling renders every page, ignoring the render cache")
+        render_cache = None
+
+    # the manifest records what every output was built from, so the next build can skip it.
+    # a caller can pass one in, loaded for an incremental build, empty for a full one
+    if manifest is None:
+        manifest = load_manifest(incremental)
+
+    # without a usable manifest we can't tell what's stale, so start from a clean public dir
+    if not (incremental and manifest.loaded):
+        if exists(dir_path_public):
+            print("public dir found, deleting")
+            rmtree(dir_path_public)
+
+    # one walk over the sources finds the pages and the files copied as they are
+    with profiler.phase("discovery") if profiler else nullcontext():
+        pages, assets, skipped = discover_site(include, exclude)
+    keep_skipped_outputs(manifest, skipped)
 
     # copy all static files to equivalent locations in public
-    static_to_public(dir_path_static, dir_path_public)
+    with profiler.phase("static copy") if profiler else nullcontext():
+        static_files = copy_assets(assets, manifest, link)
+
+    # the sizes of the images, and their smaller copies, have to be known before pages use them
+    with profiler.phase("images") if profiler else nullcontext():
+        # skipped images too, pages built now show them the same as in a full build
+        configure_images(process_images(static_files + skipped, dir_path_public, manifest, image_widths))
 
     # generate pages
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, base_path)
+    generate_pages_recursive(dir_path_content, template_path, dir_path_public, base_path, manifest, jobs, profiler, render_cache, minify, image_widths, pages)
 
-def static_to_public(source, destination):          
-    # check if the destination has this directory already
-    if not exists(destination):
-        print(f"{destination} not found, creating..")
-        mkdir(destination)
-
-    # check if file is directory or file, then copy it or call this function one layer deeper
-    for file in listdir(source):
-        source_file_path = join(source, file)
-        destination_file_path = join(destination, file)
-        if isfile(source_file_path):
-            print(f"Copying {file} from {source_file_path} to {destination_file_path}")
-            copy(source_file_path, destination_file_path)
-        # else it's a dir
+    # the search index, and with a site url the sitemap and feed, come from the page metadata
+    write_site_indexes(manifest, dir_path_public, dir_path_content, base_path, site_url)
+    update_search_index(manifest, dir_path_public, base_path)
+
+    # compressed copies come last, they're made from everything written before
+    if compress:
+        compress_outputs(manifest, compress, compress_min_size)
+
+    # anything the last build made that wasn't made this time has lost its source
+    removed = remove_stale_outputs(manifest, dir_path_public)
+    manifest.save()
+
+    # report what changed, so callers like the dev server know what to reload
+    return manifest.rebuilt + removed
+
+def load_manifest(incremental):
+    # the manifest of the last build for an incremental one, an empty one otherwise
+    manifest = Manifest(manifest_path)
+    if incremental:
+        manifest.load()
+    return manifest
+
+def discover_site(include=(), exclude=()):
+    # (pages, assets, skipped), see find_site_files. skipped are the (source, destination) of
+    # the files left out by include and exclude, a build of part of the site keeps their outputs.
+    # the ones left out by .buildignore files aren't part of the site at all
+    pages, assets = find_site_files(include, exclude)
+    skipped = []
+    if include or exclude:
+        selected = {file[0] for file in pages + assets}
+        all_pages, all_assets = find_site_files()
+        skipped = [(file[0], file[1]) for file in all_pages + all_assets if file[0] not in selected]
+    return pages, assets, skipped
+
+def find_site_files(include=(), exclude=()):
+    # markdown in the content dir becomes pages, (source, destination) pairs, anything else there
+    # is copied along with the static dir, as (source, destination, stat). files starting with an
+    # underscore are snippets for includes, not pages of their own
+    pages = []
+    assets = []
+    for file in discover(dir_path_content, include, [*exclude, SNIPPET_PATTERN]):
+        destination_path = join(dir_path_public, file.relative)
+        if destination_path.endswith(".md"):
+            pages.append((file.path, destination_path[:-len(".md")] + ".html"))
         else:
-            print(f"Directory found. Searching for files in {file} at {source_file_path}")
-            static_to_public(source_file_path, destination_file_path)
-            
-
-def generate_page(from_path, template_path, dest_path, base_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    markdown = ""
-    template = ""
+            assets.append((file.path, destination_path, file.stat()))
+    for file in discover(dir_path_static, include, exclude):
+        assets.append((file.path, join(dir_path_public, file.relative), file.stat()))
+    return pages, assets
+
+def keep_skipped_outputs(manifest, skipped):
+    # the outputs of the skipped sources stay as the last build left them: the pages and copies
+    # made from them, and what was made of them in turn, like scaled copies of an image. an
+    # output deleted since isn't kept, the next build that doesn't skip its source makes it again
+    destinations = {normpath(destination_path) for _, destination_path in skipped}
+    sources = {normpath(source_path) for source_path, _ in skipped}
+    for path, entry in manifest.outputs.items():
+        if (path in destinations or not sources.isdisjoint(entry["inputs"])) and exists(path):
+            manifest.keep(path, entry["settings"])
+
+def static_to_public(source, destination, manifest, link=False):
+    # copies everything under source, see copy_assets
+    files = [(file.path, join(destination, file.relative), file.stat()) for file in discover(source)]
+    return copy_assets(files, manifest, link)
+
+def copy_assets(files, manifest, link=False):
+    # only copy files that are new or whose size or mtime changed, copies keep the source's mtime.
+    # files are (source, destination, stat), returns (source, destination) of every one
+    copies = []
+    unchanged = 0
+    for source_path, destination_path, info in files:
+        if needs_copy(info, destination_path):
+            copies.append((source_path, destination_path))
+            manifest.record(destination_path, [], {})
+        else:
+            unchanged += 1
+            manifest.keep(destination_path, {})
+
+    # create the directories first, then copy in parallel, the copies are mostly waiting on disk.
+    # concurrent.futures pulls in logging, it's imported where it's used to keep startup quick
+    from concurrent.futures import ThreadPoolExecutor
+    make_directories([destination_path for _, destination_path in copies])
+    with ThreadPoolExecutor() as pool:
+        list(pool.map(lambda paths: copy_static(*paths, link), copies))
+
+    print(f"Static files: {len(copies)} copied, {unchanged} unchanged")
+    return [(source_path, destination_path) for source_path, destination_path, _ in files]
+
+def needs_copy(info, destination_path):
+    try:
+        existing = stat(destination_path)
+    except FileNotFoundError:
+        return True
+    return existing.st_size != info.st_size or existing.st_mtime_ns != info.st_mtime_ns
+
+def copy_static(source_path, destination_path, link):
+    if link:
+        # a hardlink costs no copying at all, but only works within one filesystem
+        try:
+            if exists(destination_path):
+                remove(destination_path)
+            os_link(source_path, destination_path)
+            return
+        except OSError:
+            pass
+    # copy2 keeps the mtime for the next comparison, and the copy itself uses sendfile where the OS has it
+    copy2(source_path, destination_path)
+
+def render_page(from_path, template_path, base_path, minify=False):
+    # this runs inside the worker processes, so it must not touch anything shared
     with open(from_path) as md:
-        markdown = md.read()
-    
-    with open(template_path) as tmp:
-        template = tmp.read()
-
-    html = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown)
-
-    # first add the content, then add the basepath
-    page = template.replace("{{ Title }}", title).replace("{{ Content }}", html)
-    page = page.replace('href="/', f'href="{base_path}').replace('src="/', f'src="{base_path}')
-    
-    # check if the destination path exists else make it
-    if not exists(dirname(dest_path)):
-        makedirs(dirname(dest_path))
+        template, values, dependencies, metadata = build_page(md, from_path, template_path, base_path, minify)
+    return template.render(values), dependencies, metadata
+
+def profile_page(from_path, template_path, dest_path, base_path, profiler, minify=False):
+    # the same steps as render_page, but split up so every phase can be timed on its own
+    print(f"Profiling page from {from_path} to {dest_path} using {template_path}")
+    profiler.start_page(dest_path)
+
+    with profiler.phase("file read"):
+        with open(from_path) as md:
+            markdown = md.read()
+
+    reader = BlockReader(markdown.split("\n"), dirname(from_path))
+    excerpt = []
+    with profiler.instrument(block_markdown_handler, {"classify_block": "block typing"}), profiler.instrument(renderer, {"text_to_children": "inline parsing"}):
+        node = blocks_to_html_node(collect_excerpt(profiler.timed(reader, "block split"), excerpt))
+    if reader.title is None:
+        raise Exception(f"no header found in {from_path}")
+
+    with profiler.phase("html serialization"):
+        terms = tokenize(text_content(node))
+        images = annotate_images(node, block_markdown_handler.image_table, base_path)
+        rewrite_urls(node, base_path)
+        content = node.to_html(minify)
+
+    with profiler.phase("template fill"):
+        template = load_template(template_path, base_path, minify)
+        page = template.render({"Title": reader.title, "Content": content})
+
+    with profiler.phase("write"):
+        write_page(dest_path, page)
+    dependencies = [from_path, template_path] + template.dependencies + reader.dependencies + image_dependencies(images)
+    return dependencies, {"title": reader.title, "excerpt": make_excerpt(excerpt), "terms": " ".join(sorted(terms))}
+
+def build_page(lines, from_path, template_path, base_path, minify=False):
+    # the source is parsed block by block from its lines, an open file is never held in memory
+    # as a whole. blocks seen before on other pages come straight out of the cache, with the
+    # basepath applied to the urls in their tree, not to whatever text happens to look like one
+    reader = BlockReader(lines, dirname(from_path))
+    excerpt = []
+    terms = set()
+    images = set()
+    node = blocks_to_cached_html_node(collect_excerpt(reader, excerpt), base_path, terms, minify, images)
+
+    if reader.title is None:
+        raise Exception(f"no header found in {from_path}")
 
+    # the template is only read and compiled once per process
+    template = load_template(template_path, base_path, minify)
+
+    # everything the page was built from, so a change to any of them rebuilds just this page
+    dependencies = [from_path, template_path] + template.dependencies + reader.dependencies + image_dependencies(images)
+    # what the sitemap, feed and search indexes need to know about the page, gathered on the same pass
+    metadata = {"title": reader.title, "excerpt": make_excerpt(excerpt), "terms": " ".join(sorted(terms))}
+    return template, {"Title": reader.title, "Content": node}, dependencies, metadata
+
+def image_dependencies(urls):
+    # the files behind the images a page shows, their size is part of the page. images that
+    # don't exist yet are recorded as static files, adding one rebuilds the pages showing it
+    table = block_markdown_handler.image_table
+    return [table[url]["source"] if url in table else join(dir_path_static, url[1:]) for url in sorted(urls)]
+
+def write_page(dest_path, page):
+    # the directories were all made before the first page was written
     with open(dest_path, "w") as file:
         print(page, file=file)
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path):
+def stream_page(dest_path, template, values):
+    # the content is serialized into the file as it's written, the page is never one string
+    with open(dest_path, "w") as file:
+        template.write(file, values)
+        file.write("\n")
+
+def make_directories(paths):
+    # one makedirs per directory instead of an exists check per page, parents come first
+    for directory in sorted({dirname(path) for path in paths}):
+        makedirs(directory, exist_ok=True)
+
+def section_template(source_path, dir_path_content, template_path):
+    # a page in content/<section>/ uses templates/<section>.html if there is one.
+    # the candidate is returned even when it doesn't exist, so creating it rebuilds the section
+    parts = relpath(source_path, dir_path_content).split("/")
+    if len(parts) < 2:
+        return template_path, None
+    candidate = join(dir_path_templates, parts[0] + ".html")
+    return (candidate if isfile(candidate) else template_path), candidate
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path, manifest, jobs=1, profiler=None, render_cache=None, minify=False, image_widths=(), pages=None):
+    # pages are the (source, destination) pairs from discover_site, found here when not given
+    if pages is None:
+        pages = find_site_files()[0]
+
     # check if the destination has this directory already
     if not exists(dest_dir_path):
         print(f"{dest_dir_path} not found, creating..")
         mkdir(dest_dir_path)
 
-    # iterate over every file in the dir to see if its a file or a dir. Copy the file, recurse the dir
-    for file in listdir(dir_path_content):
-        source_path = join(dir_path_content, file)
-        destination_path = join(dest_dir_path, file)
+    # only set when on, so builds without it keep matching the outputs of earlier builds
+    settings = {"base_path": base_path}
+    if minify:
+        settings["minify"] = True
+    if image_widths:
+        settings["image_widths"] = sorted(set(image_widths))
 
-        if isfile(source_path):
-            destination_path = destination_path.replace(".md", ".html")
-            generate_page(source_path, template_path, destination_path, base_path)
+    # find everything up front so the work can be handed out to several processes.
+    # the dependency graph of the last build tells which outputs one of the changed inputs went into
+    dirty = []
+    for source_path, destination_path in pages:
+        if manifest.is_dirty(destination_path, settings):
+            page_template, candidate = section_template(source_path, dir_path_content, template_path)
+            dirty.append((source_path, destination_path, page_template, candidate))
+    pages = dirty
+    make_directories([page[1] for page in pages])
+
+    # pages rendered by an earlier build, maybe on another machine, don't need parsing at all
+    keys = {}
+    if render_cache is not None:
+        pages, keys = restore_cached_pages(pages, settings, manifest, render_cache)
+
+    if jobs > 1 and len(pages) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        print(f"Rendering {len(pages)} pages with {jobs} workers")
+        # workers get a block cache of the same size as this process, and its image sizes
+        with ProcessPoolExecutor(max_workers=jobs, initializer=configure_block_cache, initargs=(block_cache_info().maxsize, block_markdown_handler.image_table)) as pool:
+            sources = [page[0] for page in pages]
+            templates = [page[2] for page in pages]
+            # hand out pages in batches so the inter-process overhead doesn't eat the gains
+            chunksize = max(1, len(pages) // (jobs * 4))
+            rendered = pool.map(render_page, sources, templates, [base_path] * len(pages), [minify] * len(pages), chunksize=chunksize)
+
+            # map yields in submission order, so pages are always written in the same order
+            for page, (html, dependencies, metadata) in zip(pages, rendered):
+                source_path, destination_path, page_template, _ = page
+                print(f"Generating page from {source_path} to {destination_path} using {page_template}")
+                write_page(destination_path, html)
+                record_page(manifest, render_cache, keys, settings, page, html, dependencies, metadata)
+    elif profiler is not None:
+        for page in pages:
+            source_path, destination_path, page_template, _ = page
+            dependencies, metadata = profile_page(source_path, page_template, destination_path, base_path, profiler, minify)
+            record_page(manifest, render_cache, keys, settings, page, None, dependencies, metadata)
+    elif len(pages) < PIPELINE_DEPTH:
+        # with a handful of pages there is nothing for a pipeline to overlap, and importing
+        # asyncio alone takes longer than building them
+        for page in pages:
+            source_path, destination_path, page_template, _ = page
+            print(f"Generating page from {source_path} to {destination_path} using {page_template}")
+            with open(source_path) as md:
+                template, values, dependencies, metadata = build_page(md, source_path, page_template, base_path, minify)
+            # streamed into the file like in the pipeline, only the render cache needs a string
+            html = None
+            if destination_path in keys:
+                html = template.render(values)
+                write_page(destination_path, html)
+            else:
+                stream_page(destination_path, template, values)
+            record_page(manifest, render_cache, keys, settings, page, html, dependencies, metadata)
+    else:
+        import asyncio
+        def record(page, html, dependencies, metadata):
+            record_page(manifest, render_cache, keys, settings, page, html, dependencies, metadata)
+        asyncio.run(pipeline(pages, base_path, record, minify, keys))
+
+async def pipeline(pages, base_path, record, minify=False, keep_html=()):
+    # reading, rendering and writing run as three stages connected by bounded queues. a thread
+    # of its own reads the sources a chunk of lines at a time, ahead of the parser, and the
+    # writes happen in threads as well, so slow disks overlap with parsing instead of stalling
+    # it. sources are parsed line by line as the chunks come in and pages are serialized
+    # straight into their files, neither is ever one string in memory, and the queues keep the
+    # reader from running arbitrarily far ahead of the writer. only the pages in keep_html, the
+    # ones going into the render cache, are rendered to a string, which is handed to record
+    import asyncio
+    from queue import Queue, Empty
+    from threading import Thread, Event
+
+    chunks = Queue(PIPELINE_DEPTH)
+    outputs = asyncio.Queue(PIPELINE_DEPTH)
+    stopped = Event()
+
+    def read():
+        # every source in order, followed by None. an error takes the place of the next chunk
+        try:
+            for page in pages:
+                with open(page[0]) as md:
+                    while lines := md.readlines(READ_CHUNK_SIZE):
+                        chunks.put(lines)
+                        # the build failed elsewhere, the file is closed on the way out
+                        if stopped.is_set():
+                            return
+                chunks.put(None)
+        except Exception as e:
+            chunks.put(e)
+
+    def source_lines():
+        # the lines of the next source. the parser takes them from the loop, it only has to wait
+        # when the reader is behind, and then there is nothing else to parse anyway
+        while (item := chunks.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield from item
+
+    async def render():
+        for page in pages:
+            source_path, destination_path, page_template, _ = page
+            print(f"Generating page from {source_path} to {destination_path} using {page_template}")
+            lines = source_lines()
+            template, values, dependencies, metadata = build_page(lines, source_path, page_template, base_path, minify)
+            # the next chunk belongs to the next source
+            for _ in lines:
+                pass
+            html = template.render(values) if destination_path in keep_html else None
+            await outputs.put((page, template, values, html, dependencies, metadata))
+            # rendering never waits on the other stages, give them a turn between pages
+            await asyncio.sleep(0)
+        await outputs.put(None)
+
+    async def write():
+        while (item := await outputs.get()) is not None:
+            page, template, values, html, dependencies, metadata = item
+            if html is None:
+                await asyncio.to_thread(stream_page, page[1], template, values)
+            else:
+                await asyncio.to_thread(write_page, page[1], html)
+            record(page, html, dependencies, metadata)
+
+    reader = Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        # if a stage fails the error comes out here, and asyncio.run cancels the other
+        await asyncio.gather(render(), write())
+    finally:
+        # a reader still going is told to stop, and given room in the queue to notice
+        stopped.set()
+        while reader.is_alive():
+            try:
+                chunks.get_nowait()
+            except Empty:
+                reader.join(0.01)
+
+def record_page(manifest, render_cache, keys, settings, page, html, dependencies, metadata):
+    source_path, destination_path, _, candidate = page
+    if candidate is not None:
+        dependencies = dependencies + [candidate]
+    manifest.record(destination_path, dependencies, settings, page_metadata(source_path, metadata))
+    if destination_path in keys:
+        inputs = manifest.new_outputs[normpath(destination_path)]["inputs"]
+        render_cache.put(keys[destination_path], html, inputs, metadata)
+
+def page_metadata(source_path, metadata):
+    # the rendered metadata only depends on the content, where the page came from is added here
+    return dict(metadata, source=normpath(source_path), mtime=stat(source_path).st_mtime)
+
+def restore_cached_pages(pages, settings, manifest, render_cache):
+    # write out every page the cache has, return the rest along with the keys to store them under.
+    # the key covers the source and template, includes and partials are checked against the entry
+    missing = []
+    keys = {}
+    for source_path, destination_path, page_template, candidate in pages:
+        key = render_cache.key(manifest.hash_file(source_path), manifest.hash_file(page_template), settings)
+        entry = render_cache.get(key, manifest.hash_file)
+        if entry is None:
+            missing.append((source_path, destination_path, page_template, candidate))
+            keys[destination_path] = key
         else:
-            print(f"Directory found. Searching for files in {file} at {source_path}")
-            generate_pages_recursive(source_path, template_path, destination_path, base_path)
-main()
\ No newline at end of file
+            print(f"Restoring page {destination_path} from the render cache")
+            html, inputs, metadata = entry
+            write_page(destination_path, html)
+            manifest.record(destination_path, list(inputs), settings, page_metadata(source_path, metadata))
+    return missing, keys
+
+def remove_stale_outputs(manifest, root):
+    removed = []
+    for path in manifest.stale_outputs():
+        if exists(path):
+            print(f"Removing stale output {path}")
+            remove(path)
+            removed.append(path)
+
+        # clean up directories that are now empty, but never the public dir itself
+        root = normpath(root)
+        directory = dirname(path)
+        while directory and directory != root and exists(directory) and not listdir(directory):
+            rmdir(directory)
+            directory = dirname(directory)
+
+    return removed
+
+# worker processes may re-import this module, they must not start a build of their own
+if __name__ == "__main__":
+    main()
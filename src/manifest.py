@@ -0,0 +1,161 @@
+import json
+from hashlib import sha256
+from os import stat, replace
+from os.path import exists, normpath
+
+from depgraph import DependencyGraph
+
+# bump this whenever the layout of the manifest file changes, old manifests are then ignored
+MANIFEST_VERSION = 4
+
+# The manifest remembers, for every output of the previous build, which input files it was
+# built from (with their content hashes) and which settings were used.
+# An output only needs rebuilding if one of those inputs or settings changed, which outputs
+# those are is worked out once per build from the dependency graph of the previous build.
+# Input hashes are cached by (size, mtime) so unchanged files don't have to be read again.
+# All paths are stored normalized, so "./docs/index.html" and "docs/index.html" are the same.
+# Pages also keep the metadata collected while rendering them, so site wide files like the
+# sitemap can be made from the manifest without parsing any page again.
+# Facts worked out from the content of an input, like the size of an image, are kept by its hash.
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        # results of the previous build
+        self.files = {}
+        self.outputs = {}
+        self.derived = {}
+        # results of the current build
+        self.new_files = {}
+        self.new_outputs = {}
+        self.new_derived = {}
+        # outputs that were (re)built by the current build
+        self.rebuilt = []
+        self.written = set()
+        # outputs of the previous build with a changed input, worked out on first use
+        self.affected = None
+        # whether there is a previous build at all
+        self.loaded = False
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != MANIFEST_VERSION:
+            return False
+
+        self.files = data["files"]
+        self.outputs = data["outputs"]
+        self.derived = data["derived"]
+        self.loaded = True
+        return True
+
+    def save(self):
+        data = {"version": MANIFEST_VERSION, "files": self.new_files, "outputs": self.new_outputs, "derived": self.new_derived}
+
+        # write to a temporary file first so an interrupted build never leaves a broken manifest
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file)
+        replace(tmp_path, self.path)
+
+    def next(self):
+        # the manifest for the build after this one, straight from memory instead of the file
+        manifest = Manifest(self.path)
+        manifest.files = self.new_files
+        manifest.outputs = self.new_outputs
+        manifest.derived = self.new_derived
+        manifest.loaded = True
+        return manifest
+
+    def graph(self):
+        return DependencyGraph(self.outputs)
+
+    def hash_file(self, path):
+        path = normpath(path)
+        if path in self.new_files:
+            return self.new_files[path][2]
+
+        try:
+            info = stat(path)
+        except OSError:
+            return None
+
+        # reuse the old hash if the file looks untouched
+        cached = self.files.get(path)
+        if cached is not None and cached[0] == info.st_size and cached[1] == info.st_mtime_ns:
+            digest = cached[2]
+        else:
+            digest = hash_bytes(path)
+
+        self.new_files[path] = [info.st_size, info.st_mtime_ns, digest]
+        return digest
+
+    def derive(self, path, compute):
+        # compute(path) for a file, reused for as long as its content hashes the same.
+        # only what this build asked for is saved, so results for old contents don't pile up
+        digest = self.hash_file(path)
+        if digest in self.new_derived:
+            return self.new_derived[digest]
+        value = self.derived[digest] if digest in self.derived else compute(path)
+        self.new_derived[digest] = value
+        return value
+
+    def is_dirty(self, dest_path, settings):
+        # anything that wasn't built last time (or was deleted since) is dirty
+        dest_path = normpath(dest_path)
+        entry = self.outputs.get(dest_path)
+        if entry is None or entry["settings"] != settings or not exists(dest_path):
+            return True
+
+        if self.affected is None:
+            self.affected = self.graph().affected(self.hash_file)
+        if dest_path in self.affected:
+            return True
+
+        # outputs can be inputs of other outputs, like a page of its compressed copy. the affected
+        # outputs were worked out before this build wrote anything, those inputs need a fresh look
+        for input_path, digest in entry["inputs"].items():
+            if input_path in self.written and self.hash_file(input_path) != digest:
+                return True
+
+        # the output is up to date, carry its entry over into the new manifest
+        self.new_outputs[dest_path] = entry
+        return False
+
+    def record(self, dest_path, input_paths, settings, metadata=None):
+        # input paths that don't exist (yet) are recorded too, creating one makes the output dirty
+        dest_path = normpath(dest_path)
+        inputs = {}
+        for input_path in input_paths:
+            inputs[normpath(input_path)] = self.hash_file(input_path)
+        self.new_outputs[dest_path] = {"inputs": inputs, "settings": settings}
+        if metadata is not None:
+            self.new_outputs[dest_path]["metadata"] = metadata
+        self.rebuilt.append(dest_path)
+
+        # the output was just written, a hash taken of it earlier in the build is out of date
+        self.written.add(dest_path)
+        self.new_files.pop(dest_path, None)
+
+    def keep(self, dest_path, settings):
+        # an output that is known to be up to date without hashing its inputs
+        dest_path = normpath(dest_path)
+        self.new_outputs[dest_path] = self.outputs.get(dest_path) or {"inputs": {}, "settings": settings}
+
+    def pages(self):
+        # (output, metadata) for every page of the current build, in a stable order
+        return [(path, entry["metadata"]) for path, entry in sorted(self.new_outputs.items()) if "metadata" in entry]
+
+    def stale_outputs(self):
+        # outputs of the previous build that weren't produced by this one
+        return [path for path in self.outputs if path not in self.new_outputs]
+
+def hash_bytes(path):
+    digest = sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,133 @@
+import struct
+import zlib
+from itertools import accumulate
+
+# Just enough PNG to make smaller copies of an image with nothing but the standard library:
+# decoding 8 bit, non interlaced grayscale, RGB and their alpha variants, a box filter to scale
+# down, and encoding the result. Anything else raises UnsupportedPNG.
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# channels per pixel for each supported color type
+CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+
+class UnsupportedPNG(Exception):
+    pass
+
+def read_png(path):
+    # returns width, height, color type and the unfiltered rows, one bytes object per row
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:8] != SIGNATURE:
+        raise UnsupportedPNG(f"{path} is not a png")
+
+    position = 8
+    header = None
+    compressed = []
+    while position < len(data):
+        length, kind = struct.unpack(">I4s", data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            compressed.append(body)
+        elif kind == b"IEND":
+            break
+        position += length + 12
+
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or color_type not in CHANNELS or interlace:
+        raise UnsupportedPNG(f"{path}: only 8 bit, non interlaced, non palette pngs can be scaled")
+
+    channels = CHANNELS[color_type]
+    raw = zlib.decompress(b"".join(compressed))
+    return width, height, color_type, unfilter(raw, width * channels, height, channels)
+
+def unfilter(raw, stride, height, bpp):
+    rows = []
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        kind = raw[start]
+        row = bytearray(raw[start + 1:start + 1 + stride])
+        if kind == 1:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif kind == 2:
+            for i in range(stride):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind == 3:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                up = previous[i]
+                upper_left = previous[i - bpp] if i >= bpp else 0
+                estimate = left + up - upper_left
+                distance_left, distance_up, distance_upper_left = abs(estimate - left), abs(estimate - up), abs(estimate - upper_left)
+                if distance_left <= distance_up and distance_left <= distance_upper_left:
+                    predictor = left
+                elif distance_up <= distance_upper_left:
+                    predictor = up
+                else:
+                    predictor = upper_left
+                row[i] = (row[i] + predictor) & 0xFF
+        rows.append(bytes(row))
+        previous = row
+    return rows
+
+def scale_rows(rows, width, height, channels, new_width, new_height):
+    # every new pixel is the average of the block of old pixels it covers. the rows of a block
+    # are added up column by column, then running totals per channel give the sum over any span
+    columns = []
+    for x in range(new_width):
+        left = x * width // new_width
+        columns.append((left, max((x + 1) * width // new_width, left + 1)))
+
+    scaled = []
+    for y in range(new_height):
+        top = y * height // new_height
+        bottom = max((y + 1) * height // new_height, top + 1)
+        sums = [sum(values) for values in zip(*rows[top:bottom])]
+        row = bytearray(new_width * channels)
+        for channel in range(channels):
+            totals = list(accumulate(sums[channel::channels], initial=0))
+            row[channel::channels] = bytes((totals[right] - totals[left]) // ((right - left) * (bottom - top)) for left, right in columns)
+        scaled.append(bytes(row))
+    return scaled
+
+def write_png(path, width, height, color_type, rows):
+    # which filter suits a scaled image best differs a lot from image to image, so the rows are
+    # compressed unfiltered and with the up filter (each byte minus the one above it), and the
+    # smaller of the two is kept
+    unfiltered = b"".join(b"\0" + row for row in rows)
+    previous = bytes(len(rows[0]))
+    up = bytearray()
+    for row in rows:
+        up.append(2)
+        up.extend((current - above) & 0xFF for current, above in zip(row, previous))
+        previous = row
+    data = min(zlib.compress(unfiltered, 9), zlib.compress(bytes(up), 9), key=len)
+
+    with open(path, "wb") as file:
+        file.write(SIGNATURE)
+        write_chunk(file, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+        write_chunk(file, b"IDAT", data)
+        write_chunk(file, b"IEND", b"")
+
+def write_chunk(file, kind, body):
+    file.write(struct.pack(">I", len(body)))
+    file.write(kind)
+    file.write(body)
+    file.write(struct.pack(">I", zlib.crc32(kind + body)))
+
+def scale_png(source_path, copies):
+    # writes copies of the png scaled down to other widths, keeping the aspect ratio.
+    # copies are (path, width) pairs, the source is only decoded once for all of them
+    width, height, color_type, rows = read_png(source_path)
+    for path, new_width in copies:
+        new_height = max(1, round(height * new_width / width))
+        scaled = scale_rows(rows, width, height, CHANNELS[color_type], new_width, new_height)
+        write_png(path, new_width, new_height, color_type, scaled)
@@ -0,0 +1,113 @@
+import json
+from sys import getallocatedblocks
+from time import perf_counter
+from contextlib import contextmanager
+
+# The build phases in the order they happen, used to lay out the report
+PHASES = ["static copy", "file read", "block split", "block typing", "inline parsing", "html serialization", "template fill", "write"]
+
+# Records wall time and allocations per build phase, in total and for every page.
+# Allocations are counted as the growth in allocated memory blocks while the phase ran,
+# which is cheap enough to measure around every single call.
+class Profiler:
+    def __init__(self):
+        self.totals = {}
+        self.pages = {}
+        self.page = None
+        # phases currently being timed, so recursive calls aren't counted twice
+        self.running = set()
+
+    def start_page(self, page):
+        self.page = page
+        self.pages[page] = {}
+
+    @contextmanager
+    def phase(self, name):
+        if name in self.running:
+            yield
+            return
+
+        self.running.add(name)
+        blocks = getallocatedblocks()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start, getallocatedblocks() - blocks)
+            self.running.discard(name)
+
+    def add(self, name, seconds, blocks):
+        for phases in [self.totals, self.pages.get(self.page)]:
+            if phases is None:
+                continue
+            entry = phases.setdefault(name, [0.0, 0, 0])
+            entry[0] += seconds
+            entry[1] += blocks
+            entry[2] += 1
+
+    def timed(self, iterable, name):
+        # time each step of an iterator, like a BlockReader pulling the next block out of the file
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextmanager
+    def instrument(self, module, functions):
+        # swap the module's functions for timed versions, for as long as the profile runs.
+        # functions maps function names to the phase they belong to
+        originals = {name: getattr(module, name) for name in functions}
+        for name, phase in functions.items():
+            setattr(module, name, self.wrap(originals[name], phase))
+        try:
+            yield
+        finally:
+            for name, function in originals.items():
+                setattr(module, name, function)
+
+    def wrap(self, function, name):
+        def timed_function(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return timed_function
+
+    def report(self):
+        return {
+            "phases": {name: to_json(entry) for name, entry in sorted(self.totals.items(), key=phase_order)},
+            "pages": {page: {name: to_json(entry) for name, entry in sorted(phases.items(), key=phase_order)} for page, phases in self.pages.items()},
+        }
+
+    def write_report(self, path):
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def print_summary(self, top=10):
+        print(f"\n{'phase':<20} {'total ms':>10} {'calls':>8} {'alloc blocks':>13}")
+        for name, (seconds, blocks, calls) in sorted(self.totals.items(), key=phase_order):
+            print(f"{name:<20} {seconds * 1000:>10.2f} {calls:>8} {blocks:>13}")
+
+        page_times = sorted(self.pages.items(), key=lambda item: -page_seconds(item[1]))[:top]
+        if not page_times:
+            return
+
+        print(f"\n{len(page_times)} slowest pages")
+        columns = [name for name in PHASES if name in self.totals and name != "static copy"]
+        print(f"{'page':<40} {'total ms':>9} " + " ".join(f"{name[:10]:>10}" for name in columns))
+        for page, phases in page_times:
+            cells = " ".join(f"{phases.get(name, [0.0])[0] * 1000:>10.2f}" for name in columns)
+            print(f"{page[-40:]:<40} {page_seconds(phases) * 1000:>9.2f} {cells}")
+
+def page_seconds(phases):
+    return sum(entry[0] for entry in phases.values())
+
+def phase_order(item):
+    name = item[0]
+    return PHASES.index(name) if name in PHASES else len(PHASES)
+
+def to_json(entry):
+    seconds, blocks, calls = entry
+    return {"ms": round(seconds * 1000, 3), "allocated_blocks": blocks, "calls": calls}
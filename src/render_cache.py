@@ -0,0 +1,99 @@
+import json
+from hashlib import sha256
+from os import makedirs, replace, scandir, remove, utime
+from os.path import join, exists
+
+from block_markdown_handler import PARSER_VERSION
+
+# bump this whenever the layout of an entry changes, it's part of every key
+ENTRY_VERSION = 4
+
+# A content addressed cache of rendered pages that lives on disk and survives between builds,
+# so it can be saved and restored between CI jobs as a plain directory.
+# Every entry is one file, <dir>/<first two characters of the key>/<key>.json, where the key is
+# the hash of the source, the template and the settings. Includes and partials aren't known before
+# the page is parsed, so the entry stores the hashes of every input and is only used if they match.
+# It also keeps the metadata that was collected while rendering the page.
+# Reading an entry bumps its mtime, and once the cache grows past its size cap the entries that
+# were used least recently are deleted.
+class RenderCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source_hash, template_hash, settings):
+        data = json.dumps([ENTRY_VERSION, PARSER_VERSION, source_hash, template_hash, settings], sort_keys=True)
+        return sha256(data.encode()).hexdigest()
+
+    def path(self, key):
+        return join(self.directory, key[:2], key + ".json")
+
+    def get(self, key, hash_file):
+        # returns the page, the inputs it was built from and its metadata, or None
+        path = self.path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+            page, inputs, metadata = entry["page"], dict(entry["inputs"]), entry["metadata"]
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (ValueError, KeyError, TypeError):
+            # a truncated or mangled entry, say from an interrupted cache restore in CI. it's
+            # rendered again and the new entry takes its place
+            self.misses += 1
+            self.remove(path)
+            return None
+
+        # an included file or partial changed since the page was rendered
+        if any(hash_file(input_path) != digest for input_path, digest in inputs.items()):
+            self.misses += 1
+            return None
+
+        # mark it as recently used for the eviction
+        utime(path)
+        self.hits += 1
+        return page, inputs, metadata
+
+    def remove(self, path):
+        try:
+            remove(path)
+        except FileNotFoundError:
+            # another build sharing the directory got there first
+            pass
+
+    def put(self, key, page, inputs, metadata):
+        path = self.path(key)
+        makedirs(join(self.directory, key[:2]), exist_ok=True)
+
+        # write to a temporary file first, a build that dies halfway must not leave half a page behind
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"inputs": inputs, "metadata": metadata, "page": page}, file)
+        replace(tmp_path, path)
+
+    def evict(self):
+        if not exists(self.directory):
+            return 0
+
+        entries = []
+        total = 0
+        for shard in scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in scandir(shard.path):
+                info = entry.stat()
+                entries.append((info.st_mtime_ns, info.st_size, entry.path))
+                total += info.st_size
+
+        # drop the least recently used entries until the cache fits again
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            remove(path)
+            total -= size
+            removed += 1
+        return removed
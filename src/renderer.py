@@ -0,0 +1,169 @@
+from textnode import TextNode, TextType
+from htmlnode import LeafNode, ParentNode, text_node_to_html_node, rebase_url, collapse_whitespace, PRESERVE_WHITESPACE
+from inline_markdown_handler import text_to_textnodes
+from images import image_attributes
+
+# The block parser works out what a block is (render_block in block_markdown_handler) and hands
+# its parts to a renderer, which decides what comes out:
+#   TreeRenderer builds HTMLNode trees, for tests and for anything that transforms the tree
+#   HtmlRenderer writes the html straight away, no tree in between, which is what builds use
+# Both give the same html for the same markdown, byte for byte, minified or not.
+class Renderer:
+    def heading(self, level, text):
+        raise NotImplementedError("function not implemented in child class")
+
+    def code(self, text):
+        raise NotImplementedError("function not implemented in child class")
+
+    def quote(self, text):
+        raise NotImplementedError("function not implemented in child class")
+
+    def unordered_list(self, items):
+        raise NotImplementedError("function not implemented in child class")
+
+    def ordered_list(self, items):
+        raise NotImplementedError("function not implemented in child class")
+
+    def paragraph(self, text):
+        raise NotImplementedError("function not implemented in child class")
+
+class TreeRenderer(Renderer):
+    # every method returns the node of its block
+    def heading(self, level, text):
+        return ParentNode(f"h{level}", text_to_children(text))
+
+    def code(self, text):
+        return ParentNode("pre", [text_node_to_html_node(TextNode(text, TextType.CODE))])
+
+    def quote(self, text):
+        return ParentNode("blockquote", text_to_children(text))
+
+    def unordered_list(self, items):
+        return ParentNode("ul", create_list_leaves(items))
+
+    def ordered_list(self, items):
+        return ParentNode("ol", create_list_leaves(items))
+
+    def paragraph(self, text):
+        return ParentNode("p", text_to_children(text))
+
+def text_to_children(text):
+    result = []
+
+    text_nodes = text_to_textnodes(text)
+    for node in text_nodes:
+        if node.text_type == TextType.LINK:
+            result.append(link_to_html_node(node))
+        else:
+            result.append(text_node_to_html_node(node))
+
+    return result
+
+def link_to_html_node(node):
+    # link text can hold inline markdown of its own, like bold text or an image
+    children = text_to_children(node.text)
+    if all(child.tag == None for child in children):
+        return text_node_to_html_node(node)
+    return ParentNode("a", children, {'href': f"{node.url}"})
+
+def create_list_leaves(items):
+    # the items come out of classify_block with their markers already taken off. a bare "-" or
+    # "1." line is an empty item, the only element allowed to have no content
+    return [ParentNode("li", children) if (children := text_to_children(item)) else LeafNode("li", "") for item in items]
+
+INLINE_TAGS = {TextType.BOLD: "b", TextType.ITALIC: "i", TextType.CODE: "code"}
+
+# Writes the html of the blocks it's given into parts, with the urls already following the base
+# path and the images annotated from an image table (see images.py). On the same pass it keeps
+# what the tree would have to be walked again for: the text of every leaf, in document order,
+# and the root relative urls of the images. Call html() for the html so far.
+class HtmlRenderer(Renderer):
+    def __init__(self, base_path="/", minify=False, images=None):
+        self.base_path = base_path
+        self.minify = minify
+        self.images = images or {}
+        self.parts = []
+        self.text = []
+        self.image_urls = []
+
+    def html(self):
+        return "".join(self.parts)
+
+    def heading(self, level, text):
+        self.element(f"h{level}", text)
+
+    def code(self, text):
+        # <pre> and <code> keep their whitespace even when minifying
+        if text:
+            self.text.append(text)
+        self.parts.append(f"<pre><code>{text}</code></pre>")
+
+    def quote(self, text):
+        self.element("blockquote", text)
+
+    def unordered_list(self, items):
+        self.list("ul", items)
+
+    def ordered_list(self, items):
+        self.list("ol", items)
+
+    def paragraph(self, text):
+        self.element("p", text)
+
+    def list(self, tag, items):
+        self.parts.append(f"<{tag}>")
+        for item in items:
+            # an empty item is fine, unlike any other empty element, see create_list_leaves
+            self.parts.append("<li>")
+            self.inline(text_to_textnodes(item))
+            self.parts.append("</li>")
+        self.parts.append(f"</{tag}>")
+
+    def element(self, tag, text):
+        self.parts.append(f"<{tag}>")
+        # the same rule ParentNode enforces when it's serialized
+        if not self.inline(text_to_textnodes(text)):
+            raise ValueError("parent node must have at least 1 child")
+        self.parts.append(f"</{tag}>")
+
+    def inline(self, nodes):
+        for node in nodes:
+            if node.text_type == TextType.TEXT:
+                self.leaf(None, node.text)
+            elif node.text_type in INLINE_TAGS:
+                self.leaf(INLINE_TAGS[node.text_type], node.text)
+            elif node.text_type == TextType.LINK:
+                href = rebase_url(node.url, self.base_path)
+                children = text_to_textnodes(node.text)
+                # a link with nothing but text in it is a single leaf, like in link_to_html_node
+                if all(child.text_type == TextType.TEXT for child in children):
+                    self.leaf("a", node.text, f' href="{href}"')
+                else:
+                    self.parts.append(f'<a href="{href}">')
+                    self.inline(children)
+                    self.parts.append("</a>")
+            elif node.text_type == TextType.IMAGE:
+                self.image(node.url, node.text)
+            else:
+                raise Exception("node type not recognized")
+        return len(nodes)
+
+    def leaf(self, tag, value, attributes=""):
+        if value:
+            self.text.append(value)
+        if self.minify and tag not in PRESERVE_WHITESPACE:
+            value = collapse_whitespace(value)
+        if tag is None:
+            self.parts.append(value)
+        else:
+            self.parts.append(f"<{tag}{attributes}>{value}</{tag}>")
+
+    def image(self, url, alt):
+        props = {"src": rebase_url(url, self.base_path), "alt": alt}
+        if url.startswith("/") and not url.startswith("//"):
+            self.image_urls.append(url)
+            info = self.images.get(url)
+            if info is not None:
+                props.update(image_attributes(info, self.base_path))
+        attributes = "".join(f' {attribute}="{value}"' for attribute, value in props.items())
+        self.parts.append(f"<img{attributes}></img>")
@@ -0,0 +1,187 @@
+import re
+import json
+import gzip
+from bisect import bisect_left, insort
+from hashlib import sha256
+from itertools import accumulate
+from array import array
+from collections import defaultdict
+from zlib import crc32
+from os import makedirs
+from os.path import join, exists
+
+from site_index import page_info
+
+# A full text search index for the generated site, served as static files so searching needs
+# no server. It lives in <public dir>/search/:
+#   docs.json      {"version": 1, "shards": 64, "docs": [[url, title], ...]}, a document id is
+#                  its position in docs, ids of removed pages are null until they're reused
+#   <n>.json.gz    gzipped {term: postings}, for every term with crc32(term) % shards == n.
+#                  postings are the sorted ids of the documents holding the term, stored as
+#                  the first id followed by the gaps between ids, which keeps the numbers small
+# A client lowercases the query, looks the words up in their shards and intersects the ids.
+#
+# Pages are given their ids once and keep them. Every page's terms are kept in its manifest
+# metadata, so after an incremental build only the shards holding terms that a changed page
+# gained or lost are read and written again.
+
+SEARCH_VERSION = 1
+SHARD_COUNT = 64
+
+# words of two characters or more, single letters and digits only add noise
+TOKEN_PATTERN = re.compile(r"\w{2,}")
+
+def tokenize(text):
+    return frozenset(TOKEN_PATTERN.findall(text.lower()))
+
+def shard_of(term, shards=SHARD_COUNT):
+    return crc32(term.encode()) % shards
+
+def encode_postings(ids):
+    return [ids[0]] + [current - previous for previous, current in zip(ids, ids[1:])] if len(ids) else []
+
+def decode_postings(deltas):
+    return list(accumulate(deltas))
+
+def update_search_index(manifest, public_dir, base_path="/"):
+    directory = join(public_dir, "search")
+    makedirs(directory, exist_ok=True)
+    pages = dict(manifest.pages())
+
+    if can_update(manifest, directory):
+        written = update_shards(manifest, directory, pages)
+    else:
+        written = build_shards(directory, pages)
+
+    print(f"Search index: {len(pages)} pages, {len(written)} of {SHARD_COUNT} shards written")
+    for shard in range(SHARD_COUNT):
+        path = shard_path(directory, shard)
+        if shard in written:
+            manifest.record(path, [], {})
+        else:
+            manifest.keep(path, {})
+
+    # the document table changes whenever a page is added, removed or renamed
+    text = docs_table(pages, public_dir, base_path)
+    table_path = join(directory, "docs.json")
+    settings = {"digest": sha256(text.encode()).hexdigest()}
+    if manifest.is_dirty(table_path, settings):
+        with open(table_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        manifest.record(table_path, [], settings)
+
+def can_update(manifest, directory):
+    # the shards on disk must be the ones the last build wrote, for the last build's pages
+    try:
+        with open(join(directory, "docs.json")) as file:
+            table = json.load(file)
+    except (OSError, ValueError):
+        return False
+    if table.get("version") != SEARCH_VERSION or table.get("shards") != SHARD_COUNT:
+        return False
+    if not all(exists(shard_path(directory, shard)) for shard in range(SHARD_COUNT)):
+        return False
+    return all("doc" in entry["metadata"] for entry in manifest.outputs.values() if "metadata" in entry)
+
+def build_shards(directory, pages):
+    # ids follow the page order, so every postings list is built already sorted. ids are kept
+    # in compact arrays, and the shard of a term is only worked out once all pages are in
+    postings = defaultdict(lambda: array("I"))
+    for doc, path in enumerate(sorted(pages)):
+        pages[path]["doc"] = doc
+        for term in pages[path]["terms"].split():
+            postings[term].append(doc)
+
+    shards = [{} for _ in range(SHARD_COUNT)]
+    for term, ids in postings.items():
+        shards[shard_of(term)][term] = ids
+    del postings
+    for shard, terms in enumerate(shards):
+        write_shard(directory, shard, terms)
+        # let go of each shard once it's on disk
+        shards[shard] = None
+    return set(range(SHARD_COUNT))
+
+def update_shards(manifest, directory, pages):
+    # work out which terms every changed page gained or lost, grouped by shard
+    changes = [{} for _ in range(SHARD_COUNT)]
+    def change(doc, terms, add):
+        for term in terms:
+            changes[shard_of(term)].setdefault(term, []).append((doc, add))
+
+    used = set()
+    added = []
+    for path, metadata in sorted(pages.items()):
+        old = manifest.outputs.get(path, {}).get("metadata")
+        if old is None:
+            added.append(metadata)
+            continue
+        metadata["doc"] = old["doc"]
+        used.add(old["doc"])
+        if old is not metadata and old["terms"] != metadata["terms"]:
+            old_terms = set(old["terms"].split())
+            new_terms = set(metadata["terms"].split())
+            change(old["doc"], new_terms - old_terms, True)
+            change(old["doc"], old_terms - new_terms, False)
+
+    for path, entry in manifest.outputs.items():
+        if "metadata" in entry and path not in pages:
+            change(entry["metadata"]["doc"], entry["metadata"]["terms"].split(), False)
+
+    # new pages take the ids removed pages left behind first
+    free = (doc for doc in range(len(used) + len(added)) if doc not in used)
+    for metadata, doc in zip(added, free):
+        metadata["doc"] = doc
+        change(doc, metadata["terms"].split(), True)
+
+    written = set()
+    for shard, terms in enumerate(changes):
+        if not terms:
+            continue
+        postings = read_shard(directory, shard)
+        for term, updates in terms.items():
+            ids = postings.get(term, [])
+            for doc, add in updates:
+                position = bisect_left(ids, doc)
+                if add:
+                    insort(ids, doc)
+                elif position < len(ids) and ids[position] == doc:
+                    del ids[position]
+            if ids:
+                postings[term] = ids
+            else:
+                postings.pop(term, None)
+        write_shard(directory, shard, postings)
+        written.add(shard)
+    return written
+
+def docs_table(pages, public_dir, base_path):
+    docs = [None] * (max((metadata["doc"] for metadata in pages.values()), default=-1) + 1)
+    for path, metadata in pages.items():
+        docs[metadata["doc"]] = [page_info(path, metadata, public_dir, base_path)["url"], metadata["title"]]
+    return json.dumps({"version": SEARCH_VERSION, "shards": SHARD_COUNT, "docs": docs}, ensure_ascii=False, separators=(",", ":"))
+
+def shard_path(directory, shard):
+    return join(directory, f"{shard}.json.gz")
+
+def read_shard(directory, shard):
+    with gzip.open(shard_path(directory, shard), "rt", encoding="utf-8") as file:
+        return {term: decode_postings(deltas) for term, deltas in json.load(file).items()}
+
+def write_shard(directory, shard, postings):
+    # sorted and with a fixed gzip timestamp, the same postings always give the same bytes.
+    # level 3 is four times faster than the default 6 and only a few percent bigger
+    data = {term: encode_postings(postings[term]) for term in sorted(postings)}
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    with open(shard_path(directory, shard), "wb") as file:
+        file.write(gzip.compress(text.encode(), compresslevel=3, mtime=0))
+
+def search(directory, query):
+    # what a client does, handy for checking an index: the urls of the pages holding every word
+    with open(join(directory, "docs.json")) as file:
+        table = json.load(file)
+    results = None
+    for term in tokenize(query):
+        ids = set(read_shard(directory, shard_of(term, table["shards"])).get(term, []))
+        results = ids if results is None else results & ids
+    return sorted(table["docs"][doc][0] for doc in results or [])
@@ -0,0 +1,206 @@
+from main import build_site, dir_path_public, dir_path_content, dir_path_static, dir_path_templates, template_path
+from template import load_template
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from threading import Condition, Thread
+from functools import partial
+from argparse import ArgumentParser
+from urllib.parse import urlsplit
+from os import scandir, stat, listdir
+from os.path import isfile, isdir, join
+from time import sleep, perf_counter
+
+# browsers subscribe to this endpoint and reload the page whenever a rebuild finishes
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = f'<script>new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();</script>'
+
+def main():
+    parser = ArgumentParser(description="Build the site and serve it locally")
+    parser.add_argument("base_path", nargs="?", default="/", help="path the site is served from")
+    parser.add_argument("--watch", action="store_true", help="rebuild changed pages and reload the browser on every edit")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between checks for changed files")
+    args = parser.parse_args()
+
+    build_site(args.base_path, incremental=True)
+
+    live_reload = LiveReload()
+    if args.watch:
+        Thread(target=watch, args=(args.interval, args.base_path, live_reload), daemon=True).start()
+
+    # the public dir is mounted at the base path, so the links in the pages work as deployed
+    mount = args.base_path.rstrip("/") + "/"
+    handler = partial(DevRequestHandler, live_reload, mount, directory=dir_path_public)
+    server = ThreadingHTTPServer(("localhost", args.port), handler)
+    server.daemon_threads = True
+    print(f"Serving {dir_path_public} at http://localhost:{args.port}{mount}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+# A counter that goes up after every rebuild, the event stream handlers block on it
+class LiveReload:
+    def __init__(self):
+        self.version = 0
+        self.condition = Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+# Serves the public dir at the base path, everything outside of it is a 404 except for a
+# redirect from the root
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    def __init__(self, live_reload, base_path="/", *args, **kwargs):
+        self.live_reload = live_reload
+        self.base_path = base_path
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        url_path = urlsplit(self.path).path
+        if url_path == RELOAD_PATH:
+            self.send_events()
+            return
+        if not url_path.startswith(self.base_path):
+            if url_path == "/" or url_path + "/" == self.base_path:
+                self.send_response(302)
+                self.send_header("Location", self.base_path)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            else:
+                self.send_error(404, f"Outside of the site at {self.base_path}")
+            return
+
+        # html pages get the reload script, everything else (and directory redirects) is served as is
+        path = self.translate_path(self.path)
+        if url_path.endswith("/") and isdir(path):
+            path = join(path, "index.html")
+        if not (path.endswith(".html") and isfile(path)):
+            super().do_GET()
+            return
+
+        with open(path, "rb") as file:
+            page = inject_reload_script(file.read().decode("utf-8")).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(page)
+
+    def send_head(self):
+        # HEAD requests don't go through do_GET
+        if not urlsplit(self.path).path.startswith(self.base_path):
+            self.send_error(404, f"Outside of the site at {self.base_path}")
+            return None
+        return super().send_head()
+
+    def translate_path(self, path):
+        return super().translate_path("/" + path[len(self.base_path):])
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        version = self.live_reload.version
+        try:
+            while True:
+                new_version = self.live_reload.wait(version, 15)
+                if new_version != version:
+                    version = new_version
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    # a comment line keeps the connection alive and notices closed tabs
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def inject_reload_script(page):
+    index = page.rfind("</body>")
+    if index == -1:
+        return page + RELOAD_SCRIPT
+    return page[:index] + RELOAD_SCRIPT + page[index:]
+
+def snapshot(paths):
+    # map every watched file to its mtime and size, scandir tells directories apart without an extra stat
+    files = {}
+    pending = list(paths)
+    while pending:
+        path = pending.pop()
+        try:
+            if isfile(path):
+                info = stat(path)
+                files[path] = (info.st_mtime_ns, info.st_size)
+                continue
+            with scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            pending.append(entry.path)
+                        else:
+                            info = entry.stat()
+                            files[entry.path] = (info.st_mtime_ns, info.st_size)
+                    except FileNotFoundError:
+                        # deleted since the directory was listed, or a dangling symlink
+                        continue
+        except (FileNotFoundError, NotADirectoryError):
+            # gone for a moment, like a template an editor replaces on save. it's missing from
+            # this snapshot, so the next one, with it back, counts as a change
+            continue
+    return files
+
+def watched_paths(base_path="/"):
+    # everything a build reads: the sources, the templates and the partials they include.
+    # partials can sit anywhere, even next to the public dir, so they're watched file by file
+    templates = [template_path]
+    if isdir(dir_path_templates):
+        templates += [join(dir_path_templates, name) for name in sorted(listdir(dir_path_templates)) if name.endswith(".html")]
+    partials = set()
+    for path in templates:
+        try:
+            # the same compiled template the build uses
+            partials.update(load_template(path, base_path).dependencies)
+        except (OSError, ValueError):
+            # a template being edited, the build reports what's wrong with it
+            pass
+    return [dir_path_content, dir_path_static, dir_path_templates, template_path] + sorted(partials)
+
+def watch(interval, base_path, live_reload):
+    # polling keeps this dependency free, at 50ms it's well inside the time a browser reload takes
+    paths = watched_paths(base_path)
+    before = snapshot(paths)
+    while True:
+        sleep(interval)
+        after = snapshot(paths)
+        if after == before:
+            continue
+        before = after
+
+        start = perf_counter()
+        try:
+            changed = build_site(base_path, incremental=True)
+        except Exception as e:
+            # a half typed edit shouldn't kill the server, wait for the next change
+            print(f"Build failed: {e}")
+            continue
+
+        print(f"Rebuilt {len(changed)} outputs in {(perf_counter() - start) * 1000:.0f}ms")
+        # an edited template may include other partials now
+        added = [path for path in watched_paths(base_path) if path not in paths]
+        if added:
+            paths += added
+            before.update(snapshot(added))
+        if changed:
+            live_reload.notify()
+
+if __name__ == "__main__":
+    main()
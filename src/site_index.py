@@ -0,0 +1,90 @@
+import json
+from hashlib import sha256
+from datetime import datetime, timezone
+from html import escape as escape_html
+from os.path import join, relpath, normpath
+
+# Site wide files made from the metadata the manifest keeps for every page: a search index,
+# and given the absolute url of the site a sitemap and an RSS feed of the blog.
+# None of them needs a page parsed again, and each is only rewritten when its content changed,
+# so adding one post touches that post, the feed and the indexes and nothing else.
+
+# posts in the feed, newest first
+FEED_LENGTH = 20
+
+def write_site_indexes(manifest, public_dir, content_dir, base_path, site_url=None, feed_section="blog"):
+    pages = [page_info(path, metadata, public_dir, base_path) for path, metadata in manifest.pages()]
+
+    files = {join(public_dir, "search.json"): search_index(pages)}
+    if site_url is not None:
+        site_url = site_url.rstrip("/")
+        files[join(public_dir, "sitemap.xml")] = sitemap(pages, site_url)
+
+        section_dir = normpath(join(content_dir, feed_section))
+        posts = [page for page in pages if page["source"].startswith(section_dir + "/")]
+        if posts:
+            feed_url = f"{site_url}{base_path}{feed_section}/feed.xml"
+            home = [page for page in pages if page["url"] == base_path]
+            title = home[0]["title"] if home else site_url
+            files[join(public_dir, feed_section, "feed.xml")] = feed(posts, title, site_url, base_path, feed_url)
+
+    for path, text in files.items():
+        # the digest of the content stands in for the settings, so unchanged files are kept
+        settings = {"digest": sha256(text.encode()).hexdigest()}
+        if manifest.is_dirty(path, settings):
+            print(f"Writing {path}")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+            manifest.record(path, [], settings)
+
+def escape(text):
+    # &, < and >, xml.sax.saxutils.escape without the urllib and http imports it drags in
+    return escape_html(text, quote=False)
+
+def page_info(path, metadata, public_dir, base_path):
+    # pages are served from their directory, docs/blog/tom/index.html is /blog/tom/
+    url = base_path + relpath(path, public_dir)
+    if url.endswith("index.html"):
+        url = url[:-len("index.html")]
+    return dict(metadata, url=url)
+
+def search_index(pages):
+    entries = [{"title": page["title"], "url": page["url"], "excerpt": page["excerpt"]} for page in pages]
+    return json.dumps(entries, ensure_ascii=False, separators=(",", ":"))
+
+def sitemap(pages, site_url):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for page in sorted(pages, key=lambda page: page["url"]):
+        lastmod = datetime.fromtimestamp(page["mtime"], timezone.utc).date().isoformat()
+        lines.append(f"  <url><loc>{escape(site_url + page['url'])}</loc><lastmod>{lastmod}</lastmod></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+def feed(posts, title, site_url, base_path, feed_url):
+    # email.utils is slow to import and only needed here
+    from email.utils import format_datetime
+    # no lastBuildDate, it would change the feed on every build
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">',
+        "<channel>",
+        f"  <title>{escape(title)}</title>",
+        f"  <link>{escape(site_url + base_path)}</link>",
+        f"  <description>{escape(f'Latest posts from {title}')}</description>",
+        f'  <atom:link href="{escape(feed_url)}" rel="self" type="application/rss+xml" />',
+    ]
+    newest = sorted(posts, key=lambda post: (-post["mtime"], post["url"]))[:FEED_LENGTH]
+    for post in newest:
+        url = escape(site_url + post["url"])
+        published = format_datetime(datetime.fromtimestamp(post["mtime"], timezone.utc))
+        lines.extend([
+            "  <item>",
+            f"    <title>{escape(post['title'])}</title>",
+            f"    <link>{url}</link>",
+            f"    <guid>{url}</guid>",
+            f"    <pubDate>{published}</pubDate>",
+            f"    <description>{escape(post['excerpt'])}</description>",
+            "  </item>",
+        ])
+    lines.extend(["</channel>", "</rss>"])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,146 @@
+import re
+from io import StringIO
+from os import stat
+from os.path import join, dirname, normpath
+
+from htmlnode import rebase_url, collapse_whitespace, PRESERVE_WHITESPACE
+
+# matches a slot like {{ Title }} or {{ Content }}
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# matches a partial like {{> header.html }}, its path is relative to the file including it
+PARTIAL_PATTERN = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+MAX_PARTIAL_DEPTH = 10
+
+# root relative urls inside the template's own markup
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+
+# comments and tags in the template, and the name of a tag, for minifying
+MARKUP_PATTERN = re.compile(r"<!--.*?-->|<[^>]*>", re.DOTALL)
+TAG_NAME_PATTERN = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)")
+
+# elements that start on a line of their own, or aren't shown at all, so whitespace next to them
+# never ends up between two words on the page
+BLOCK_ELEMENTS = {
+    "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript", "template",
+    "header", "footer", "main", "nav", "article", "section", "aside", "div", "p", "pre", "blockquote",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd", "hr", "br", "figure",
+    "figcaption", "table", "caption", "thead", "tbody", "tfoot", "tr", "th", "td", "form", "fieldset",
+    "details", "summary", "address",
+}
+
+# A template is compiled once into the literal text between slots and the names of the slots.
+# Partials are pasted in and the literal parts already have the base path applied, so rendering
+# a page is just a join. dependencies lists the partial files the template was built from.
+# A minified template has its whitespace stripped once here, not on every page. Values are
+# written as they are, a minified page needs its content serialized with minify as well.
+class Template:
+    def __init__(self, source, base_path="/", directory=None, minify=False):
+        self.segments = []
+        self.slots = []
+        self.dependencies = []
+
+        if directory is not None:
+            source = self.expand_partials(source, directory, 0)
+        if minify:
+            source = minify_markup(source)
+
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.segments.append(rebase_markup(source[position:match.start()], base_path))
+            self.slots.append(match.group(1))
+            position = match.end()
+        self.segments.append(rebase_markup(source[position:], base_path))
+
+    def expand_partials(self, source, directory, depth):
+        if depth > MAX_PARTIAL_DEPTH:
+            raise ValueError(f"partials nested more than {MAX_PARTIAL_DEPTH} deep, is one including itself?")
+
+        def include(match):
+            path = normpath(join(directory, match.group(1)))
+            self.dependencies.append(path)
+            with open(path) as file:
+                return self.expand_partials(file.read(), dirname(path), depth + 1)
+
+        return PARTIAL_PATTERN.sub(include, source)
+
+    def write(self, fp, values):
+        # values are either plain strings or HTMLNodes, which get streamed into fp as they serialize
+        fp.write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            if slot not in values:
+                raise ValueError(f"no value given for template slot {slot}")
+            value = values[slot]
+            if isinstance(value, str):
+                fp.write(value)
+            else:
+                value.write_html(fp)
+            fp.write(segment)
+
+    def render(self, values):
+        buffer = StringIO()
+        self.write(buffer, values)
+        return buffer.getvalue()
+
+def minify_markup(markup):
+    # whitespace next to a block level tag that only lays out the source (it holds a line break)
+    # is dropped, any other run of whitespace becomes one space. between inline elements, like
+    # two links on their own lines, it's a space on the page and has to stay one. inside <pre>
+    # and the like nothing changes
+    parts = []
+    preserved = 0
+    position = 0
+    # the start and the end of the markup count as block level
+    previous_block = True
+    for match in MARKUP_PATTERN.finditer(markup):
+        block = is_block_markup(match.group(0))
+        parts.append(minify_text(markup[position:match.start()], preserved, previous_block or block))
+        parts.append(match.group(0))
+        name = TAG_NAME_PATTERN.match(match.group(0))
+        if name is not None and name.group(2).lower() in PRESERVE_WHITESPACE:
+            preserved += -1 if name.group(1) else 1
+        position = match.end()
+        previous_block = block
+    parts.append(minify_text(markup[position:], preserved, True))
+    return "".join(parts)
+
+def is_block_markup(markup):
+    # a doctype is block level, a comment takes the place of nothing
+    if markup.startswith("<!"):
+        return not markup.startswith("<!--")
+    name = TAG_NAME_PATTERN.match(markup)
+    return name is not None and name.group(2).lower() in BLOCK_ELEMENTS
+
+def minify_text(text, preserved, next_to_block):
+    if preserved > 0:
+        return text
+    if next_to_block and not text.strip() and "\n" in text:
+        return ""
+    return collapse_whitespace(text)
+
+def rebase_markup(markup, base_path):
+    return URL_ATTRIBUTE_PATTERN.sub(lambda match: f'{match.group(1)}="{rebase_url(match.group(2), base_path)}"', markup)
+
+# compiled templates per (path, base path, minify), along with the mtimes of the files they came from
+templates = {}
+
+def load_template(path, base_path="/", minify=False):
+    # a cached template is reused until the template or one of its partials is edited,
+    # so long running builds pick up changes
+    cached = templates.get((path, base_path, minify))
+    if cached is not None:
+        template, mtimes = cached
+        if all(mtime(file_path) == file_mtime for file_path, file_mtime in mtimes.items()):
+            return template
+
+    with open(path) as file:
+        template = Template(file.read(), base_path, dirname(path), minify)
+    mtimes = {file_path: mtime(file_path) for file_path in [path] + template.dependencies}
+    templates[(path, base_path, minify)] = (template, mtimes)
+    return template
+
+def mtime(path):
+    try:
+        return stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
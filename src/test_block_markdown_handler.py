@@ -1,6 +1,13 @@
 import unittest
+from io import StringIO
 
-from block_markdown_handler import markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, extract_title
+from block_markdown_handler import markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, extract_title, BlockReader, classify_block, collect_excerpt, make_excerpt
+from corpus import make_corpus
+from tempfile import TemporaryDirectory
+from os import makedirs
+from os.path import join
+from block_markdown_handler import blocks_to_cached_html_node, configure_block_cache, block_cache_info, BLOCK_CACHE_SIZE
+from htmlnode import rewrite_urls
 
 class TestBlockHandler(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -79,6 +86,76 @@ class TestBlockHandler(unittest.TestCase):
             ],
         )
 
+    def test_markdown_whitespace_line(self):
+        md = "first line\n   \nsame block\n\n\n\nnext block"
+        self.assertEqual(markdown_to_blocks(md), ["first line\n\nsame block", "next block"])
+
+    # streaming reader tests
+    def test_reader_file(self):
+        for md in make_corpus(10):
+            self.assertEqual(list(BlockReader(StringIO(md))), markdown_to_blocks(md))
+
+    def test_reader_title(self):
+        md = "Text first\n\n## Not it\n\n# The title\n\nbody"
+        reader = BlockReader(StringIO(md))
+        blocks = list(reader)
+        self.assertEqual(reader.title, "The title")
+        self.assertEqual(blocks[2], "# The title")
+
+    def test_reader_no_title(self):
+        reader = BlockReader(StringIO("## No title here\n\n#Neither is this"))
+        list(reader)
+        self.assertIsNone(reader.title)
+
+    def test_reader_is_lazy(self):
+        def lines():
+            yield "first block\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(iter(BlockReader(lines()))), "first block")
+
+    def test_reader_includes(self):
+        with TemporaryDirectory() as directory:
+            makedirs(join(directory, "snippets"))
+            with open(join(directory, "snippets", "note.md"), "w") as file:
+                file.write("> a note\n{{> license.md }}\n")
+            with open(join(directory, "snippets", "license.md"), "w") as file:
+                file.write("MIT licensed\n")
+
+            reader = BlockReader(StringIO("# Title\nintro\n{{> snippets/note.md }}\nafter"), directory)
+            self.assertEqual(list(reader), ["# Title\nintro", "> a note", "MIT licensed", "after"])
+            self.assertEqual(reader.dependencies, [join(directory, "snippets", "note.md"), join(directory, "snippets", "license.md")])
+
+    def test_reader_includes_need_directory(self):
+        reader = BlockReader(StringIO("{{> snippet.md }}"))
+        self.assertEqual(list(reader), ["{{> snippet.md }}"])
+        self.assertEqual(reader.dependencies, [])
+
+    # block cache tests
+    def test_cached_matches_uncached(self):
+        for md in make_corpus(10):
+            expected = rewrite_urls(markdown_to_html_node(md), "/site/").to_html()
+            self.assertEqual(blocks_to_cached_html_node(markdown_to_blocks(md), "/site/").to_html(), expected)
+
+    def test_cached_minified(self):
+        md = "# Title\n\nsome   text\n\n```\ncode  block\n```"
+        self.assertEqual(blocks_to_cached_html_node(markdown_to_blocks(md), "/", minify=True).to_html(), markdown_to_html_node(md).to_html(minify=True))
+        self.assertEqual(blocks_to_cached_html_node(markdown_to_blocks(md), "/", minify=True).to_html(), "<div><h1>Title</h1><p>some text</p><pre><code>code  block\n</code></pre></div>")
+
+    def test_cache_hits(self):
+        configure_block_cache(8)
+        try:
+            blocks_to_cached_html_node(["Shared [footer](/about)", "# Page one"])
+            blocks_to_cached_html_node(["Shared [footer](/about)", "# Page two"])
+            info = block_cache_info()
+            self.assertEqual((info.hits, info.misses), (1, 3))
+            # the base path is part of the key
+            html = blocks_to_cached_html_node(["Shared [footer](/about)"], "/site/").to_html()
+            self.assertEqual(html, '<div><p>Shared <a href="/site/about">footer</a></p></div>')
+        finally:
+            configure_block_cache(BLOCK_CACHE_SIZE)
+
     def test_block_heading(self):
         blocks = ["# Heading", "## Heading", "### Heading", "#### Heading", "##### Heading", "###### Heading"] 
         for block in blocks:
@@ -129,6 +206,32 @@ class TestBlockHandler(unittest.TestCase):
         for block in blocks:
             self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_classify_structure(self):
+        self.assertEqual(classify_block("### Some\nheading"), (BlockType.HEADING, (3, "Some\nheading")))
+        self.assertEqual(classify_block("```\ncode\n```"), (BlockType.CODE, "code\n"))
+        self.assertEqual(classify_block("> one > two\n>\n> three"), (BlockType.QUOTE, "one  two\n\nthree"))
+        self.assertEqual(classify_block("- a - b\n- c"), (BlockType.U_LIST, ["a - b", "c"]))
+        self.assertEqual(classify_block("1. a\n2. b 3. c"), (BlockType.O_LIST, ["a", "b 3. c"]))
+        self.assertEqual(classify_block("- a\n2. b"), (BlockType.PARAGRAPH, "- a 2. b"))
+
+    def test_classify_bare_markers(self):
+        # a marker with nothing after it is an empty item, not an error
+        self.assertEqual(classify_block("- a\n-"), (BlockType.U_LIST, ["a", ""]))
+        self.assertEqual(classify_block("1.\n2. b"), (BlockType.O_LIST, ["", "b"]))
+
+    def test_collect_excerpt(self):
+        blocks = ["# Title", "[< Back Home](/)", "Some **bold** and a [link](/x) ![img](/a.png)", "> quote", "Second paragraph"]
+        excerpt = []
+        self.assertEqual(list(collect_excerpt(blocks, excerpt)), blocks)
+        self.assertEqual(excerpt, ["Some bold and a link ", "Second paragraph"])
+        self.assertEqual(make_excerpt(excerpt), "Some bold and a link Second paragraph")
+
+    def test_excerpt_length(self):
+        excerpt = []
+        list(collect_excerpt(["word " * 50, "never read"], excerpt, 100))
+        self.assertEqual(len(excerpt), 1)
+        self.assertEqual(make_excerpt(excerpt, 12), "word word…")
+
     # test markdown to html block
     def test_header(self):
         md = """
@@ -217,6 +320,22 @@ class TestBlockHandler(unittest.TestCase):
             "<div><ol><li>This is a list</li><li>it is ordered</li><li>this is the third</li><li>now the list is done</li></ol></div>",
         )
 
+    def test_link_with_bold(self):
+        md = "See [the **docs**](https://boot.dev) and [plain](/x)"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><p>See <a href="https://boot.dev">the <b>docs</b></a> and <a href="/x">plain</a></p></div>',
+        )
+
+    def test_link_with_image(self):
+        md = "[![badge](/badge.png)](https://boot.dev)"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="https://boot.dev"><img src="/badge.png" alt="badge"></img></a></p></div>',
+        )
+
     def test_title(self):
         md = """
             # Title here
@@ -0,0 +1,71 @@
+import unittest
+import gzip
+import lzma
+from tempfile import TemporaryDirectory
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import join, exists
+
+from manifest import Manifest
+from compress import compress_outputs
+from fixtures import write
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.page = join(self.tmp.name, "index.html")
+        self.small = join(self.tmp.name, "small.css")
+        self.image = join(self.tmp.name, "a.png")
+        write(self.page, "<p>hello</p>" * 200)
+        write(self.small, "body {}")
+        write(self.image, "png" * 1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, formats=("gz",), page=None):
+        # one build: the page is (re)written if given, then the compression stage runs
+        manifest = Manifest(join(self.tmp.name, "manifest.json"))
+        manifest.load()
+        if page is not None:
+            write(self.page, page)
+            manifest.record(self.page, [], {})
+        else:
+            manifest.keep(self.page, {})
+        manifest.keep(self.small, {})
+        manifest.keep(self.image, {})
+        manifest.rebuilt = []
+        with redirect_stdout(StringIO()):
+            compress_outputs(manifest, formats)
+        manifest.save()
+        return [path for path in manifest.rebuilt if path != self.page]
+
+    def test_compresses_text_outputs(self):
+        self.assertEqual(self.build(("gz", "xz")), [self.page + ".gz", self.page + ".xz"])
+        with open(self.page, "rb") as file:
+            original = file.read()
+        with gzip.open(self.page + ".gz") as file:
+            self.assertEqual(file.read(), original)
+        with lzma.open(self.page + ".xz") as file:
+            self.assertEqual(file.read(), original)
+
+    def test_skips_small_and_binary_files(self):
+        self.build()
+        self.assertFalse(exists(self.small + ".gz"))
+        self.assertFalse(exists(self.image + ".gz"))
+
+    def test_skips_unchanged(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+        # rewritten with the same content, the hash hasn't changed
+        self.assertEqual(self.build(page="<p>hello</p>" * 200), [])
+
+    def test_recompresses_changed(self):
+        self.build()
+        self.assertEqual(self.build(page="<p>changed</p>" * 200), [self.page + ".gz"])
+        with gzip.open(self.page + ".gz") as file:
+            self.assertEqual(file.read(), b"<p>changed</p>" * 200)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from tempfile import TemporaryDirectory
+from os.path import join
+
+from corpus import make_corpus, write_corpus
+from block_markdown_handler import markdown_to_html_node, extract_title
+
+
+class TestCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(make_corpus(5, seed=3), make_corpus(5, seed=3))
+        self.assertNotEqual(make_corpus(5, seed=3), make_corpus(5, seed=4))
+
+    def test_pages_render(self):
+        for index, markdown in enumerate(make_corpus(20)):
+            self.assertTrue(extract_title(markdown).startswith(f"Page {index}:"))
+            self.assertTrue(markdown_to_html_node(markdown).to_html().startswith("<div><h1>"))
+
+    def test_write_corpus(self):
+        with TemporaryDirectory() as directory:
+            paths = write_corpus(directory, 150)
+            self.assertEqual(paths[0], join(directory, "section0", "page0", "index.md"))
+            self.assertEqual(paths[149], join(directory, "section1", "page149", "index.md"))
+            with open(paths[3]) as file:
+                self.assertEqual(file.read(), make_corpus(4)[3])
+
+if __name__ == "__main__":
+    unittest.main()
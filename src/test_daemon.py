@@ -0,0 +1,72 @@
+import unittest
+import json
+from tempfile import TemporaryDirectory
+from threading import Thread
+from http.server import HTTPServer
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
+from os import chdir, getcwd, makedirs
+from os.path import join
+
+from daemon import BuildDaemon
+from main import BuildConfig
+from fixtures import write
+
+
+class TestBuildDaemon(unittest.TestCase):
+    def setUp(self):
+        # builds work with paths relative to the site root
+        self.cwd = getcwd()
+        self.tmp = TemporaryDirectory()
+        chdir(self.tmp.name)
+        makedirs("content/blog")
+        makedirs("static")
+        write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        write("content/index.md", "# Home\n\nWelcome")
+        write("content/blog/post.md", "# Post\n\nA post")
+        self.daemon = BuildDaemon(BuildConfig())
+
+    def tearDown(self):
+        chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_rebuilds_from_memory(self):
+        self.assertIn("docs/index.html", self.daemon.build()["changed"])
+        self.assertEqual(self.daemon.build()["changed"], [])
+
+        write("content/blog/post.md", "# Post\n\nAn edited post")
+        changed = self.daemon.build()["changed"]
+        self.assertIn("docs/blog/post.html", changed)
+        self.assertNotIn("docs/index.html", changed)
+        self.assertEqual(self.daemon.builds, 3)
+
+    def test_failed_build(self):
+        self.daemon.build()
+        write("content/blog/post.md", "# Post\n\n**never closed")
+        result = self.daemon.build()
+        self.assertIn("never closed", result["error"])
+
+        # the next build picks up from the last one that worked
+        write("content/blog/post.md", "# Post\n\nFixed")
+        changed = self.daemon.build()["changed"]
+        self.assertIn("docs/blog/post.html", changed)
+        self.assertNotIn("docs/index.html", changed)
+
+    def test_http(self):
+        server = HTTPServer(("localhost", 0), self.daemon.handler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://localhost:{server.server_address[1]}"
+        try:
+            with urlopen(Request(url + "/build", method="POST")) as response:
+                self.assertIn("docs/index.html", json.load(response)["changed"])
+            with urlopen(url) as response:
+                self.assertEqual(json.load(response)["builds"], 1)
+            with self.assertRaises(HTTPError) as error:
+                urlopen(Request(url + "/other", method="POST"))
+            self.assertEqual(error.exception.code, 404)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from depgraph import DependencyGraph
+
+
+OUTPUTS = {
+    "docs/index.html": {"inputs": {"content/index.md": "a", "template.html": "t"}, "settings": {}},
+    "docs/blog/one.html": {"inputs": {"content/blog/one.md": "b", "templates/blog.html": "s", "partials/nav.html": "n"}, "settings": {}},
+    "docs/blog/two.html": {"inputs": {"content/blog/two.md": "c", "templates/blog.html": "s", "partials/nav.html": "n"}, "settings": {}},
+}
+HASHES = {"content/index.md": "a", "template.html": "t", "content/blog/one.md": "b", "content/blog/two.md": "c", "templates/blog.html": "s", "partials/nav.html": "n"}
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_dependents(self):
+        graph = DependencyGraph(OUTPUTS)
+        self.assertEqual(graph.dependents("partials/nav.html"), ["docs/blog/one.html", "docs/blog/two.html"])
+        self.assertEqual(graph.dependents("./template.html"), ["docs/index.html"])
+        self.assertEqual(graph.dependents("unknown.md"), [])
+
+    def test_nothing_changed(self):
+        self.assertEqual(DependencyGraph(OUTPUTS).affected(HASHES.get), set())
+
+    def test_shared_input_changed(self):
+        hashes = dict(HASHES, **{"templates/blog.html": "changed"})
+        self.assertEqual(DependencyGraph(OUTPUTS).affected(hashes.get), {"docs/blog/one.html", "docs/blog/two.html"})
+
+    def test_source_changed(self):
+        hashes = dict(HASHES, **{"content/blog/two.md": "changed"})
+        self.assertEqual(DependencyGraph(OUTPUTS).affected(hashes.get), {"docs/blog/two.html"})
+
+    def test_missing_input_created(self):
+        outputs = {"docs/index.html": {"inputs": {"content/index.md": "a", "templates/index.html": None}, "settings": {}}}
+        self.assertEqual(DependencyGraph(outputs).affected(HASHES.get), set())
+        hashes = dict(HASHES, **{"templates/index.html": "new"})
+        self.assertEqual(DependencyGraph(outputs).affected(hashes.get), {"docs/index.html"})
+
+    def test_input_hashed_once(self):
+        calls = []
+        def hash_file(path):
+            calls.append(path)
+            return HASHES.get(path)
+        DependencyGraph(OUTPUTS).affected(hash_file)
+        self.assertEqual(sorted(calls), sorted(HASHES))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import socket
+from tempfile import TemporaryDirectory
+from os import symlink, mkfifo
+from os.path import join
+
+from discovery import discover
+from fixtures import write
+
+
+class TestDiscover(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.root = self.tmp.name
+        for path in ["index.md", "_header.md", "blog/post.md", "blog/photo.png", "blog/drafts/idea.md", "about/index.md", "about-us.md"]:
+            write(join(self.root, path), "text")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def found(self, **kwargs):
+        return [file.relative for file in discover(self.root, **kwargs)]
+
+    def test_everything_in_walk_order(self):
+        # parents sort before their siblings that only share a prefix, like a sorted walk
+        self.assertEqual(self.found(), ["_header.md", "about/index.md", "about-us.md", "blog/drafts/idea.md", "blog/photo.png", "blog/post.md", "index.md"])
+
+    def test_paths_and_stats(self):
+        file = discover(self.root)[0]
+        self.assertEqual(file.path, join(self.root, "_header.md"))
+        self.assertEqual(file.stat().st_size, 4)
+
+    def test_exclude(self):
+        # names at any depth, or paths from the root
+        self.assertEqual(self.found(exclude=["_*", "*.png", "blog/drafts"]), ["about/index.md", "about-us.md", "blog/post.md", "index.md"])
+        self.assertEqual(self.found(exclude=["blog/*"]), ["_header.md", "about/index.md", "about-us.md", "index.md"])
+
+    def test_include(self):
+        self.assertEqual(self.found(include=["*.png"]), ["blog/photo.png"])
+        self.assertEqual(self.found(include=["blog/*.md"], exclude=["drafts"]), ["blog/post.md"])
+
+    def test_ignore_file(self):
+        write(join(self.root, "blog", ".buildignore"), "# work in progress\ndrafts\n/photo.png\n")
+        write(join(self.root, ".buildignore"), "about*\n")
+        self.assertEqual(self.found(), ["_header.md", "blog/post.md", "index.md"])
+        # under another name they're files like any other
+        self.assertEqual(len(self.found(ignore_file=".otherignore")), 9)
+
+    def test_special_files(self):
+        # sockets, fifos and broken links are neither files nor directories to walk into
+        mkfifo(join(self.root, "fifo"))
+        server = socket.socket(socket.AF_UNIX)
+        server.bind(join(self.root, "build.sock"))
+        symlink(join(self.root, "missing"), join(self.root, "broken"))
+        try:
+            self.assertNotIn("fifo", self.found())
+            self.assertNotIn("build.sock", self.found())
+            self.assertNotIn("broken", self.found())
+        finally:
+            server.close()
+
+    def test_symlink_loop(self):
+        symlink(self.root, join(self.root, "blog", "loop"))
+        found = self.found()
+        self.assertIn("blog/loop/index.md", found)
+        self.assertEqual(len(found), len(set(found)))
+        self.assertLess(len(found), 20)
+
+    def test_wide_tree(self):
+        # enough directories on one level to be read by the pool, with the same result
+        for number in range(40):
+            write(join(self.root, "wide", f"d{number:02}", "page.md"), "text")
+        sequential = self.found(workers=1)
+        self.assertEqual(self.found(workers=4), sequential)
+        self.assertEqual(len([path for path in sequential if path.startswith("wide/")]), 40)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
+from io import StringIO
 
 from textnode import TextType, TextNode
-from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node
+from htmlnode import HTMLNode, LeafNode, ParentNode, text_node_to_html_node, rewrite_urls, text_content
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -150,5 +151,58 @@ class TestHTMLNode(unittest.TestCase):
         with self.assertRaises(Exception):
             text_node_to_html_node(node)
 
+    def test_no_dict(self):
+        for node in [HTMLNode("p"), LeafNode("b", "bold"), ParentNode("div", [LeafNode(None, "text")])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    # streaming tests
+    def test_write_html(self):
+        node = ParentNode("div", [LeafNode("a", "website.com", {"href": "https://www.website.com"}), ParentNode("p", [LeafNode(None, "text")])])
+        buffer = StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), '<div><a href="https://www.website.com">website.com</a><p>text</p></div>')
+
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode("b", str(i))]) for i in range(100)])
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_deep_nesting(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        self.assertTrue(node.to_html().startswith("<span><span>"))
+
+    def test_streamed_child_errors(self):
+        parent_node = ParentNode("div", [LeafNode("p", "fine"), ParentNode("div", [])])
+        with self.assertRaises(ValueError):
+            parent_node.to_html()
+
+    # base path tests
+    def test_minify(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "Some   text\n  over"), LeafNode("b", " two  lines ")]),
+            ParentNode("pre", [LeafNode("code", "keep\n    this")]),
+            ParentNode("pre", [LeafNode(None, "and  this\n")]),
+            LeafNode(None, "after  pre"),
+        ])
+        self.assertEqual(node.to_html(minify=True), "<div><p>Some text over<b> two lines </b></p><pre><code>keep\n    this</code></pre><pre>and  this\n</pre>after pre</div>")
+        self.assertEqual(node.to_html(), "<div><p>Some   text\n  over<b> two  lines </b></p><pre><code>keep\n    this</code></pre><pre>and  this\n</pre>after  pre</div>")
+
+    def test_text_content(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "Read"), LeafNode("b", "this"), LeafNode("img", "", {"src": "/a.png"})]),
+            ParentNode("ul", [ParentNode("li", [LeafNode("a", "link", {"href": "/"})])]),
+        ])
+        self.assertEqual(text_content(node), "Read this link")
+
+    def test_rewrite_urls(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("a", "home", {"href": "/blog"}), LeafNode("a", "out", {"href": "https://boot.dev"})]),
+            LeafNode("img", "", {"src": "/images/a.png", "alt": "/images/a.png"}),
+            LeafNode("code", 'href="/'),
+        ])
+        rewrite_urls(node, "/site/")
+        self.assertEqual(node.to_html(), '<div><p><a href="/site/blog">home</a><a href="https://boot.dev">out</a></p><img src="/site/images/a.png" alt="/images/a.png"></img><code>href="/</code></div>')
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import unittest
+import struct
+from tempfile import TemporaryDirectory
+from contextlib import redirect_stdout
+from io import StringIO
+from os import makedirs
+from os.path import join
+
+from htmlnode import LeafNode, ParentNode
+from manifest import Manifest
+from png import read_png, write_png, scale_rows
+from images import image_info, process_images, annotate_images, variant_path
+
+
+class TestImageInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name, data):
+        path = join(self.tmp.name, name)
+        with open(path, "wb") as file:
+            file.write(data)
+        return path
+
+    def test_png(self):
+        path = join(self.tmp.name, "a.png")
+        write_png(path, 3, 2, 6, [bytes(12), bytes(12)])
+        self.assertEqual(image_info(path), {"width": 3, "height": 2, "scalable": True})
+
+    def test_gif(self):
+        path = self.path("a.gif", b"GIF89a" + struct.pack("<HH", 300, 200) + bytes(20))
+        self.assertEqual(image_info(path), {"width": 300, "height": 200, "scalable": False})
+
+    def test_jpeg(self):
+        # an APP0 segment and a huffman table come before the frame, padded with an extra 0xff
+        app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + bytes(9)
+        dht = b"\xff\xc4" + struct.pack(">H", 5) + bytes(3)
+        sof = b"\xff\xff\xc2" + struct.pack(">HBHH", 17, 8, 480, 640) + bytes(12)
+        path = self.path("a.jpg", b"\xff\xd8" + app0 + dht + sof)
+        self.assertEqual(image_info(path), {"width": 640, "height": 480, "scalable": False})
+
+    def test_not_an_image(self):
+        self.assertIsNone(image_info(self.path("a.png", b"just text")))
+        self.assertIsNone(image_info(self.path("b.jpg", b"\xff\xd8\xff\xe0")))
+
+
+class TestPNG(unittest.TestCase):
+    def test_round_trip(self):
+        with TemporaryDirectory() as directory:
+            path = join(directory, "a.png")
+            rows = [bytes([1, 2, 3, 250, 251, 252]), bytes([9, 8, 7, 6, 5, 4])]
+            write_png(path, 2, 2, 2, rows)
+            self.assertEqual(read_png(path), (2, 2, 2, rows))
+
+    def test_scaling_averages_blocks(self):
+        rows = [bytes([0, 100, 10, 10]), bytes([200, 100, 30, 30])]
+        self.assertEqual(scale_rows(rows, 4, 2, 1, 2, 1), [bytes([100, 20])])
+
+
+class TestProcessImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.static = join(self.tmp.name, "static")
+        self.public = join(self.tmp.name, "docs")
+        makedirs(join(self.static, "images"))
+        makedirs(join(self.public, "images"))
+        self.source = join(self.static, "images", "a.png")
+        self.destination = join(self.public, "images", "a.png")
+        write_png(self.source, 8, 4, 0, [bytes(range(8))] * 4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, widths=()):
+        manifest = Manifest(join(self.tmp.name, "manifest.json"))
+        manifest.load()
+        with redirect_stdout(StringIO()):
+            table = process_images([(self.source, self.destination)], self.public, manifest, widths)
+        manifest.save()
+        return table, manifest.rebuilt
+
+    def test_sizes(self):
+        table, _ = self.build()
+        self.assertEqual(table, {"/images/a.png": {"width": 8, "height": 4, "srcset": [], "source": self.source}})
+
+    def test_scaled_copies(self):
+        table, rebuilt = self.build([4, 16])
+        copy = variant_path(self.destination, 4)
+        # nothing is scaled up
+        self.assertEqual(rebuilt, [copy])
+        self.assertEqual(read_png(copy)[:3], (4, 2, 0))
+        self.assertEqual(table["/images/a.png"]["srcset"], [["/images/a-4w.png", 4], ["/images/a.png", 8]])
+
+        # unchanged images aren't scaled again, changed ones are
+        self.assertEqual(self.build([4])[1], [])
+        write_png(self.source, 8, 4, 0, [bytes(8)] * 4)
+        self.assertEqual(self.build([4])[1], [copy])
+
+    def test_dropped_width_is_stale(self):
+        self.build([4])
+        manifest = Manifest(join(self.tmp.name, "manifest.json"))
+        manifest.load()
+        with redirect_stdout(StringIO()):
+            process_images([(self.source, self.destination)], self.public, manifest)
+        self.assertEqual(manifest.stale_outputs(), [variant_path(self.destination, 4)])
+
+
+class TestAnnotateImages(unittest.TestCase):
+    def test_annotate(self):
+        table = {"/images/a.png": {"width": 800, "height": 600, "srcset": [["/images/a-400w.png", 400], ["/images/a.png", 800]]}}
+        known = LeafNode("img", "", {"src": "/images/a.png", "alt": "a"})
+        unknown = LeafNode("img", "", {"src": "/images/b.png", "alt": "b"})
+        remote = LeafNode("img", "", {"src": "https://example.com/c.png", "alt": "c"})
+        node = ParentNode("div", [ParentNode("p", [known]), unknown, remote])
+
+        self.assertEqual(sorted(annotate_images(node, table, "/site/")), ["/images/a.png", "/images/b.png"])
+        self.assertEqual(known.props, {
+            "src": "/images/a.png",
+            "alt": "a",
+            "width": "800",
+            "height": "600",
+            "loading": "lazy",
+            "srcset": "/site/images/a-400w.png 400w, /site/images/a.png 800w",
+            "sizes": "(max-width: 800px) 100vw, 800px",
+        })
+        self.assertEqual(unknown.props, {"src": "/images/b.png", "alt": "b"})
+        self.assertEqual(remote.props, {"src": "https://example.com/c.png", "alt": "c"})
+
+
+if __name__ == "__main__":
+    unittest.main()
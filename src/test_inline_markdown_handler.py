@@ -316,7 +316,71 @@ class TestDelimiter(unittest.TestCase):
                 TextNode(" and a ", TextType.TEXT),
                 TextNode("link", TextType.LINK, "https://boot.dev"),
                 ], nodes)
-        
+
+
+    def test_conversion_matches_chained_passes(self):
+        text = "Start **bold** then _italic_ and `code`, an ![img](/a.png) and [a link](https://boot.dev) end"
+        nodes = split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD)
+        nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+        nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        nodes = split_nodes_link(split_nodes_image(nodes))
+        self.assertListEqual(nodes, text_to_textnodes(text))
+
+    def test_conversion_many_links(self):
+        text = " ".join(f"[link {i}](https://boot.dev/{i})" for i in range(500))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 999)
+        self.assertEqual(nodes[-1], TextNode("link 499", TextType.LINK, "https://boot.dev/499"))
+
+    def test_conversion_bold_in_link(self):
+        nodes = text_to_textnodes("See [the **docs**](https://boot.dev) now")
+        self.assertListEqual(
+                [
+                TextNode("See ", TextType.TEXT),
+                TextNode("the **docs**", TextType.LINK, "https://boot.dev"),
+                TextNode(" now", TextType.TEXT),
+                ], nodes)
+
+    def test_conversion_image_in_link(self):
+        nodes = text_to_textnodes("[![badge](/badge.png)](https://boot.dev)")
+        self.assertListEqual([TextNode("![badge](/badge.png)", TextType.LINK, "https://boot.dev")], nodes)
+
+    def test_conversion_underscore_in_url(self):
+        nodes = text_to_textnodes("a [link](https://boot.dev/some_page) and _italic_")
+        self.assertListEqual(
+                [
+                TextNode("a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev/some_page"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                ], nodes)
+
+    def test_conversion_markup_in_code(self):
+        nodes = text_to_textnodes("use `a_b ** c` here")
+        self.assertListEqual(
+                [
+                TextNode("use ", TextType.TEXT),
+                TextNode("a_b ** c", TextType.CODE),
+                TextNode(" here", TextType.TEXT),
+                ], nodes)
+
+    def test_conversion_not_a_link(self):
+        nodes = text_to_textnodes("just [brackets] and ![no image]")
+        self.assertListEqual([TextNode("just [brackets] and ![no image]", TextType.TEXT)], nodes)
+
+    def test_conversion_unclosed_links(self):
+        # every [ or ![ here starts something that never closes, each of them used to search the
+        # rest of the text again. 20000 of them take a few milliseconds, not seconds
+        for unit in ["[a](x ", "![a ", "[![a](x ", "[x]("]:
+            text = unit * 20000
+            self.assertListEqual([TextNode(text, TextType.TEXT)], text_to_textnodes(text))
+        # the url still runs to the first ), like it always did
+        self.assertEqual(text_to_textnodes("[a](x ![b](c) ![d](e)"), [TextNode("a", TextType.LINK, "x ![b](c"), TextNode(" ", TextType.TEXT), TextNode("d", TextType.IMAGE, "e")])
+
+    def test_conversion_unclosed(self):
+        with self.assertRaises(Exception):
+            text_to_textnodes("this **never closes")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
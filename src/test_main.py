@@ -0,0 +1,238 @@
+import unittest
+from tempfile import TemporaryDirectory
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import join, exists
+from os import makedirs, stat, chdir, getcwd, walk, remove
+
+import asyncio
+import gc
+import warnings
+from threading import active_count
+
+from main import static_to_public, pipeline, make_directories, build, BuildConfig, READ_CHUNK_SIZE
+from manifest import Manifest
+from png import write_png
+from fixtures import write
+
+
+class TestStaticToPublic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.static = join(self.tmp.name, "static")
+        self.public = join(self.tmp.name, "public")
+        makedirs(join(self.static, "images"))
+        write(join(self.static, "index.css"), "body {}")
+        write(join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, link=False):
+        manifest = Manifest(join(self.tmp.name, "manifest.json"))
+        with redirect_stdout(StringIO()):
+            static_to_public(self.static, self.public, manifest, link)
+        return manifest
+
+    def test_copies_everything(self):
+        manifest = self.sync()
+        self.assertEqual(sorted(manifest.rebuilt), [join(self.public, "images", "a.png"), join(self.public, "index.css")])
+        with open(join(self.public, "images", "a.png")) as file:
+            self.assertEqual(file.read(), "png")
+
+    def test_skips_unchanged(self):
+        self.sync()
+        self.assertEqual(self.sync().rebuilt, [])
+
+    def test_copies_changed(self):
+        self.sync()
+        write(join(self.static, "index.css"), "body { color: red }")
+        self.assertEqual(self.sync().rebuilt, [join(self.public, "index.css")])
+
+    def test_link(self):
+        self.sync(link=True)
+        source = stat(join(self.static, "index.css"))
+        self.assertEqual(stat(join(self.public, "index.css")).st_ino, source.st_ino)
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.template = join(self.tmp.name, "template.html")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_pipeline(self, count, broken=None, keep_html=(), sources=None):
+        pages = []
+        for i in range(count):
+            source = join(self.tmp.name, "content", f"{i}.md")
+            destination = join(self.tmp.name, "public", str(i), "index.html")
+            makedirs(join(self.tmp.name, "content"), exist_ok=True)
+            if sources is not None:
+                write(source, sources[i])
+            else:
+                write(source, "no title" if i == broken else f"# Page {i}\n\ntext")
+            pages.append((source, destination, self.template, None))
+        make_directories([page[1] for page in pages])
+
+        recorded = []
+        with redirect_stdout(StringIO()):
+            asyncio.run(pipeline(pages, "/", lambda *args: recorded.append(args), keep_html=keep_html))
+        return pages, recorded
+
+    def test_writes_every_page_in_order(self):
+        # more pages than fit in the queues at once
+        pages, recorded = self.run_pipeline(50)
+        self.assertEqual([args[0] for args in recorded], pages)
+        with open(pages[7][1]) as file:
+            self.assertEqual(file.read(), "<title>Page 7</title><div><h1>Page 7</h1><p>text</p></div>\n")
+        self.assertEqual(recorded[7][2], [pages[7][0], self.template])
+        self.assertEqual(recorded[7][3], {"title": "Page 7", "excerpt": "text", "terms": "page text"})
+
+    def test_html_only_when_kept(self):
+        # pages are streamed into their files, only the render cache needs them as a string
+        kept = join(self.tmp.name, "public", "3", "index.html")
+        pages, recorded = self.run_pipeline(5, keep_html={kept})
+        self.assertEqual([args[1] is not None for args in recorded], [False, False, False, True, False])
+        with open(kept) as file:
+            self.assertEqual(file.read(), recorded[3][1] + "\n")
+
+    def test_sources_over_several_chunks(self):
+        # the reader hands over chunks of lines, a long source spans many of them
+        paragraphs = [f"paragraph {i} " + "word " * 40 for i in range(2000)]
+        long_source = "# Long\n\n" + "\n\n".join(paragraphs)
+        self.assertGreater(len(long_source), 5 * READ_CHUNK_SIZE)
+        pages, recorded = self.run_pipeline(2, sources=[long_source, "# Short\n\ntext"])
+        with open(pages[0][1]) as file:
+            self.assertEqual(file.read().count("<p>"), 2000)
+        with open(pages[1][1]) as file:
+            self.assertEqual(file.read(), "<title>Short</title><div><h1>Short</h1><p>text</p></div>\n")
+
+    def test_error_stops_the_build(self):
+        with self.assertRaises(Exception):
+            self.run_pipeline(50, broken=20)
+
+    def test_error_stops_the_reader(self):
+        # while the long first page is parsed the reader fills the queue with the others, and
+        # waits for room. when the page turns out to have no title it's stopped and closes its file
+        untitled = "\n\n".join(f"paragraph {i} " + "word " * 40 for i in range(500))
+        threads = active_count()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", ResourceWarning)
+            with self.assertRaises(Exception):
+                self.run_pipeline(50, sources=[untitled] + [f"# Page {i}" for i in range(1, 50)])
+            gc.collect()
+        self.assertEqual(active_count(), threads)
+
+    def test_missing_source(self):
+        pages = [(join(self.tmp.name, "missing.md"), join(self.tmp.name, "missing.html"), self.template, None)]
+        with redirect_stdout(StringIO()), self.assertRaises(FileNotFoundError):
+            asyncio.run(pipeline(pages, "/", lambda *args: None))
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        # builds work with paths relative to the site root
+        self.cwd = getcwd()
+        self.tmp = TemporaryDirectory()
+        chdir(self.tmp.name)
+        makedirs("content/blog")
+        makedirs("static")
+        write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        write("content/index.md", "# Home\n\nWelcome")
+        write("content/blog/post.md", "# Post\n\nA post")
+
+    def tearDown(self):
+        chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def build(self, config):
+        with redirect_stdout(StringIO()):
+            return build(config)
+
+    def test_result(self):
+        result = self.build(BuildConfig(base_path="/site/"))
+        self.assertIn("docs/blog/post.html", result.changed)
+        self.assertEqual([metadata["title"] for _, metadata in result.manifest.pages()], ["Post", "Home"])
+        self.assertIsNone(result.render_cache)
+        with open("docs/index.html") as file:
+            self.assertEqual(file.read(), "<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>\n")
+
+    def test_incremental(self):
+        self.build(BuildConfig())
+        self.assertEqual(self.build(BuildConfig(incremental=True)).changed, [])
+        write("content/blog/post.md", "# Post\n\nEdited")
+        self.assertIn("docs/blog/post.html", self.build(BuildConfig(incremental=True)).changed)
+
+    def test_jobs(self):
+        # the process pool gets the block cache size and image table, picks section templates,
+        # stores pages in the render cache and writes them in order, like a single process
+        makedirs("templates")
+        makedirs("static/images")
+        write("templates/blog.html", "<main>{{ Content }}</main>")
+        write_png("static/images/a.png", 8, 4, 0, [bytes(8)] * 4)
+        for number in range(6):
+            write(f"content/blog/post{number}.md", f"# Post {number}\n\n![a](/images/a.png) text {number}")
+        single = self.build(BuildConfig(base_path="/site/", image_widths=[4]))
+        expected = read_outputs("docs")
+
+        result = self.build(BuildConfig(base_path="/site/", image_widths=[4], jobs=2, cache_dir=".cache"))
+        self.assertEqual(read_outputs("docs"), expected)
+        self.assertEqual(result.manifest.pages(), single.manifest.pages())
+        self.assertIn("docs/blog/post3.html", result.changed)
+        self.assertEqual(result.render_cache.misses, 8)
+
+        # the pages the workers rendered went into the cache
+        restored = self.build(BuildConfig(base_path="/site/", image_widths=[4], cache_dir=".cache"))
+        self.assertEqual(restored.render_cache.hits, 8)
+        self.assertEqual(read_outputs("docs"), expected)
+
+    def test_filtered_build_keeps_other_outputs(self):
+        write("static/index.css", "body {}")
+        self.build(BuildConfig())
+        changed = self.build(BuildConfig(incremental=True, include=["blog/*"])).changed
+        self.assertEqual(changed, [])
+        for path in ["docs/index.html", "docs/index.css", "docs/blog/post.html"]:
+            self.assertTrue(exists(path), path)
+
+        # the pages left out are still in the indexes, and the next full build has nothing to do
+        write("content/blog/post.md", "# Post\n\nEdited")
+        result = self.build(BuildConfig(incremental=True, exclude=["index.md"]))
+        self.assertIn("docs/blog/post.html", result.changed)
+        self.assertEqual([metadata["title"] for _, metadata in result.manifest.pages()], ["Post", "Home"])
+        self.assertEqual(self.build(BuildConfig(incremental=True)).changed, [])
+
+    def test_filtered_build_after_deleted_outputs(self):
+        write("static/index.css", "body {}")
+        self.build(BuildConfig(incremental=True, compress=["gz"]))
+        remove("docs/index.css")
+        self.build(BuildConfig(incremental=True, compress=["gz"], include=["blog/*"]))
+        self.assertFalse(exists("docs/index.css"))
+        remove("docs/index.html")
+        self.assertIn("docs/index.css", self.build(BuildConfig(incremental=True, compress=["gz"], exclude=["index.md"])).changed)
+        self.assertFalse(exists("docs/index.html"))
+
+        # outputs that are gone aren't kept, the next build without filters makes them again
+        self.assertIn("docs/index.html", self.build(BuildConfig(incremental=True, compress=["gz"])).changed)
+        self.assertTrue(exists("docs/index.html"))
+
+    def test_filtered_build_knows_skipped_images(self):
+        makedirs("static/images")
+        write_png("static/images/a.png", 8, 4, 0, [bytes(8)] * 4)
+        write("content/blog/post.md", "# Post\n\n![a](/images/a.png)")
+        self.build(BuildConfig(include=["blog/*"]))
+        with open("docs/blog/post.html") as file:
+            self.assertIn('width="8" height="4"', file.read())
+
+def read_outputs(root):
+    # path -> bytes of every file under root
+    outputs = {}
+    for directory, _, files in walk(root):
+        for name in files:
+            path = join(directory, name)
+            with open(path, "rb") as file:
+                outputs[path] = file.read()
+    return outputs
+
+if __name__ == "__main__":
+    unittest.main()
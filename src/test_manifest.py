@@ -0,0 +1,83 @@
+import unittest
+from tempfile import TemporaryDirectory
+from os.path import join
+from os import utime, stat
+
+from manifest import Manifest
+from fixtures import write
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.source = join(self.dir, "index.md")
+        self.output = join(self.dir, "index.html")
+        self.manifest_path = join(self.dir, "manifest.json")
+        write(self.source, "# Title")
+        write(self.output, "<h1>Title</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        # run one "build" and return whether the output was rebuilt
+        manifest = Manifest(self.manifest_path)
+        manifest.load()
+        dirty = manifest.is_dirty(self.output, {"base_path": "/"})
+        if dirty:
+            manifest.record(self.output, [self.source], {"base_path": "/"})
+        manifest.save()
+        return dirty
+
+    def test_first_build_is_dirty(self):
+        self.assertTrue(self.build())
+
+    def test_unchanged_is_clean(self):
+        self.build()
+        self.assertFalse(self.build())
+
+    def test_changed_source_is_dirty(self):
+        self.build()
+        write(self.source, "# Other title")
+        self.assertTrue(self.build())
+
+    def test_touched_source_is_clean(self):
+        self.build()
+        info = stat(self.source)
+        utime(self.source, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+        self.assertFalse(self.build())
+
+    def test_changed_settings_is_dirty(self):
+        self.build()
+        manifest = Manifest(self.manifest_path)
+        manifest.load()
+        self.assertTrue(manifest.is_dirty(self.output, {"base_path": "/blog/"}))
+
+    def test_stale_outputs(self):
+        self.build()
+        manifest = Manifest(self.manifest_path)
+        manifest.load()
+        self.assertEqual(manifest.stale_outputs(), [self.output])
+
+    def test_derived_values_follow_the_content(self):
+        computed = []
+        def derive():
+            manifest = Manifest(self.manifest_path)
+            manifest.load()
+            value = manifest.derive(self.source, lambda path: computed.append(path) or len(computed))
+            manifest.save()
+            return value
+
+        self.assertEqual(derive(), 1)
+        self.assertEqual(derive(), 1)
+        write(self.source, "# Other title")
+        self.assertEqual(derive(), 2)
+        self.assertEqual(len(computed), 2)
+
+    def test_missing_manifest(self):
+        manifest = Manifest(join(self.dir, "nothing.json"))
+        self.assertFalse(manifest.load())
+
+if __name__ == "__main__":
+    unittest.main()
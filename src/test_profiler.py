@@ -0,0 +1,51 @@
+import unittest
+from types import SimpleNamespace
+
+from profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_phase(self):
+        profiler = Profiler()
+        profiler.start_page("index.html")
+        with profiler.phase("write"):
+            pass
+        with profiler.phase("write"):
+            pass
+        self.assertEqual(profiler.totals["write"][2], 2)
+        self.assertEqual(profiler.pages["index.html"]["write"][2], 2)
+
+    def test_nested_phase_counted_once(self):
+        profiler = Profiler()
+        with profiler.phase("inline parsing"):
+            with profiler.phase("inline parsing"):
+                pass
+        self.assertEqual(profiler.totals["inline parsing"][2], 1)
+
+    def test_timed(self):
+        profiler = Profiler()
+        self.assertEqual(list(profiler.timed(["a", "b"], "block split")), ["a", "b"])
+        self.assertEqual(profiler.totals["block split"][2], 3)
+
+    def test_instrument(self):
+        profiler = Profiler()
+        original = lambda x: x * 2
+        module = SimpleNamespace(double=original)
+        with profiler.instrument(module, {"double": "block typing"}):
+            self.assertEqual(module.double(2), 4)
+        self.assertIs(module.double, original)
+        self.assertEqual(profiler.totals["block typing"][2], 1)
+
+    def test_report(self):
+        profiler = Profiler()
+        profiler.start_page("index.html")
+        with profiler.phase("write"):
+            pass
+        with profiler.phase("file read"):
+            pass
+        report = profiler.report()
+        self.assertEqual(list(report["phases"]), ["file read", "write"])
+        self.assertEqual(report["pages"]["index.html"]["write"]["calls"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from tempfile import TemporaryDirectory
+from os import utime
+from os.path import exists, getsize
+
+from render_cache import RenderCache
+
+
+def hashes(files):
+    return lambda path: files.get(path)
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        cache = RenderCache(self.tmp.name, 2**20)
+        key = cache.key("source", "template", {"base_path": "/"})
+        self.assertIsNone(cache.get(key, hashes({})))
+        cache.put(key, "<html></html>", {"index.md": "a"}, {"title": "Home"})
+        self.assertEqual(cache.get(key, hashes({"index.md": "a"})), ("<html></html>", {"index.md": "a"}, {"title": "Home"}))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_changed_input_is_a_miss(self):
+        cache = RenderCache(self.tmp.name, 2**20)
+        key = cache.key("source", "template", {})
+        cache.put(key, "page", {"index.md": "a", "snippet.md": "b", "templates/blog.html": None}, {})
+        self.assertIsNone(cache.get(key, hashes({"index.md": "a", "snippet.md": "changed"})))
+        # a section template that was missing and now exists
+        self.assertIsNone(cache.get(key, hashes({"index.md": "a", "snippet.md": "b", "templates/blog.html": "c"})))
+        self.assertIsNotNone(cache.get(key, hashes({"index.md": "a", "snippet.md": "b"})))
+
+    def test_shared_between_instances(self):
+        key = RenderCache(self.tmp.name, 2**20).key("source", "template", {})
+        RenderCache(self.tmp.name, 2**20).put(key, "page", {}, {})
+        self.assertEqual(RenderCache(self.tmp.name, 2**20).get(key, hashes({})), ("page", {}, {}))
+
+    def test_broken_entry_is_a_miss(self):
+        cache = RenderCache(self.tmp.name, 2**20)
+        key = cache.key("source", "template", {})
+        for broken in ['{"inp', '{"inputs": {}}', '[1, 2]']:
+            cache.put(key, "page", {}, {})
+            with open(cache.path(key), "w") as file:
+                file.write(broken)
+            self.assertIsNone(cache.get(key, hashes({})))
+            # it's deleted, the page is stored again once it's rendered
+            self.assertFalse(exists(cache.path(key)))
+        self.assertEqual(cache.misses, 3)
+
+    def test_key(self):
+        cache = RenderCache(self.tmp.name, 2**20)
+        key = cache.key("source", "template", {"base_path": "/"})
+        self.assertEqual(key, cache.key("source", "template", {"base_path": "/"}))
+        self.assertNotEqual(key, cache.key("source", "template", {"base_path": "/site/"}))
+        self.assertNotEqual(key, cache.key("source", "other template", {"base_path": "/"}))
+
+    def test_evict_least_recently_used(self):
+        cache = RenderCache(self.tmp.name, 0)
+        keys = [cache.key(str(i), "template", {}) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, "x" * 10, {}, {})
+            # give every entry a distinct age, oldest first
+            utime(cache.path(key), ns=(i * 10**9, i * 10**9))
+        cache.get(keys[0], hashes({}))
+        # room for two of the three entries
+        cache.max_bytes = 2 * getsize(cache.path(keys[0]))
+
+        self.assertEqual(cache.evict(), 1)
+        self.assertFalse(exists(cache.path(keys[1])))
+        self.assertTrue(exists(cache.path(keys[0])))
+        self.assertTrue(exists(cache.path(keys[2])))
+
+    def test_evict_missing_directory(self):
+        self.assertEqual(RenderCache(self.tmp.name + "/nothing", 0).evict(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from block_markdown_handler import markdown_to_blocks, render_block, block_to_html_node
+from htmlnode import rewrite_urls, text_content
+from images import annotate_images
+from renderer import HtmlRenderer, Renderer
+from corpus import make_corpus, make_list_corpus
+
+IMAGES = {"/images/a.png": {"width": 800, "height": 600, "srcset": [["/images/a-400w.png", 400], ["/images/a.png", 800]]}}
+
+EDGE_CASES = [
+    "# Title with `code` and **bold**",
+    "A [plain link](/about) and a [**bold** link](https://example.com)",
+    "[![badge](/images/a.png)](/status) next to ![photo](/images/a.png) and ![gone](/images/b.png)",
+    "Text   with\n  odd    spacing and _italic   words_ and `code   spans`",
+    "```\n  indented   code\n\n```",
+    "> quoted   text\n> over two lines",
+    "- one  item\n- [two](/two)\n- ![three](//cdn.example.com/three.png)",
+    "1. first\n2. second   item",
+    "- one\n-\n- three",
+    "1.\n2. second",
+    "Empty [](/nowhere) link",
+]
+
+class TestHtmlRenderer(unittest.TestCase):
+    def assertSameAsTree(self, block, base_path="/", minify=False, images=None):
+        tree = block_to_html_node(block)
+        urls = annotate_images(tree, images or {}, base_path)
+        text = text_content(tree)
+        expected = rewrite_urls(tree, base_path).to_html(minify)
+
+        renderer = HtmlRenderer(base_path, minify, images)
+        render_block(block, renderer)
+        self.assertEqual(renderer.html(), expected, block)
+        self.assertEqual(" ".join(renderer.text), text, block)
+        self.assertEqual(sorted(renderer.image_urls), sorted(urls), block)
+
+    def test_corpus(self):
+        for markdown in make_corpus(20) + make_list_corpus(2, 20):
+            for block in markdown_to_blocks(markdown):
+                self.assertSameAsTree(block)
+                self.assertSameAsTree(block, "/site/", minify=True)
+
+    def test_edge_cases(self):
+        for block in EDGE_CASES:
+            for minify in (False, True):
+                self.assertSameAsTree(block, "/site/", minify, IMAGES)
+
+    def test_empty_element(self):
+        # a block without any content fails the same way the tree does when it's serialized
+        for block in ["# ``", "> ``"]:
+            with self.assertRaises(ValueError):
+                block_to_html_node(block).to_html()
+            with self.assertRaises(ValueError):
+                render_block(block, HtmlRenderer())
+
+    def test_empty_list_item(self):
+        renderer = HtmlRenderer()
+        render_block("- one\n-", renderer)
+        self.assertEqual(renderer.html(), "<ul><li>one</li><li></li></ul>")
+        self.assertEqual(block_to_html_node("1. one\n2.").to_html(), "<ol><li>one</li><li></li></ol>")
+
+    def test_interface(self):
+        with self.assertRaises(NotImplementedError):
+            render_block("some text", Renderer())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from tempfile import TemporaryDirectory
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import join
+
+from manifest import Manifest
+from search_index import tokenize, encode_postings, decode_postings, update_search_index, read_shard, shard_of, search, SHARD_COUNT
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.public = join(self.tmp.name, "docs")
+        self.search_dir = join(self.public, "search")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, pages):
+        # pages are {name: text}, recorded the way the page stage does before the index is made
+        manifest = Manifest(join(self.tmp.name, "manifest.json"))
+        manifest.load()
+        for name, text in pages.items():
+            path = join(self.public, name, "index.html")
+            terms = " ".join(sorted(tokenize(text)))
+            manifest.record(path, [], {}, {"title": name, "terms": terms})
+        manifest.rebuilt = []
+        with redirect_stdout(StringIO()):
+            update_search_index(manifest, self.public)
+        manifest.save()
+        return manifest
+
+    def assert_index_matches(self, manifest):
+        # every term's postings must be exactly the pages holding it
+        expected = {}
+        for _, metadata in manifest.pages():
+            for term in metadata["terms"].split():
+                expected.setdefault(term, []).append(metadata["doc"])
+        actual = {}
+        for shard in range(SHARD_COUNT):
+            for term, ids in read_shard(self.search_dir, shard).items():
+                self.assertEqual(shard_of(term), shard)
+                actual[term] = ids
+        self.assertEqual(actual, {term: sorted(ids) for term, ids in expected.items()})
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The ring, the RING of power! a 1 42"), {"the", "ring", "of", "power", "42"})
+
+    def test_postings_round_trip(self):
+        self.assertEqual(encode_postings([3, 4, 10, 200]), [3, 1, 6, 190])
+        self.assertEqual(decode_postings([3, 1, 6, 190]), [3, 4, 10, 200])
+        self.assertEqual(encode_postings([]), [])
+
+    def test_search(self):
+        self.build({"elves": "The elves went west", "hobbits": "The hobbits went home", "dwarves": "Gold"})
+        self.assertEqual(search(self.search_dir, "went"), ["/elves/", "/hobbits/"])
+        self.assertEqual(search(self.search_dir, "went WEST"), ["/elves/"])
+        self.assertEqual(search(self.search_dir, "dragons"), [])
+
+    def test_incremental_update(self):
+        pages = {f"page{i}": f"common words page{i} {'even' if i % 2 == 0 else 'odd'}" for i in range(20)}
+        manifest = self.build(pages)
+        ids = {path: metadata["doc"] for path, metadata in manifest.pages()}
+
+        # edit one page, remove one and add two
+        pages["page3"] = "common words page3 changed"
+        del pages["page8"]
+        pages["new1"] = "brand new words"
+        pages["new2"] = "another new page"
+        manifest = self.build(pages)
+        self.assert_index_matches(manifest)
+
+        # pages that were there before keep their ids, the first new page takes the freed one
+        new_ids = {path: metadata["doc"] for path, metadata in manifest.pages()}
+        for path, doc in new_ids.items():
+            if path in ids:
+                self.assertEqual(doc, ids[path])
+        self.assertEqual(new_ids[join(self.public, "new1", "index.html")], ids[join(self.public, "page8", "index.html")])
+        self.assertEqual(search(self.search_dir, "changed"), ["/page3/"])
+        self.assertEqual(search(self.search_dir, "new"), ["/new1/", "/new2/"])
+
+    def test_unchanged_writes_nothing(self):
+        pages = {"a": "one two", "b": "two three"}
+        self.build(pages)
+        self.assertEqual(self.build(pages).rebuilt, [])
+
+    def test_edit_writes_only_changed_shards(self):
+        pages = {f"page{i}": " ".join(f"word{j}" for j in range(200)) for i in range(5)}
+        self.build(pages)
+        pages["page1"] += " extra"
+        rebuilt = self.build(pages).rebuilt
+        self.assertEqual(rebuilt, [join(self.search_dir, f"{shard_of('extra')}.json.gz")])
+
+if __name__ == "__main__":
+    unittest.main()
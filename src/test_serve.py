@@ -0,0 +1,103 @@
+import unittest
+from tempfile import TemporaryDirectory
+from threading import Thread
+from functools import partial
+from http.server import HTTPServer
+from urllib.request import urlopen
+from urllib.error import HTTPError
+from os.path import join
+from os import mkdir, symlink, chdir, getcwd
+
+from serve import inject_reload_script, snapshot, watched_paths, DevRequestHandler, LiveReload, RELOAD_SCRIPT
+from fixtures import write
+
+
+class TestServe(unittest.TestCase):
+    def test_inject_reload_script(self):
+        page = "<html><body><p>hi</p></body></html>"
+        self.assertEqual(inject_reload_script(page), f"<html><body><p>hi</p>{RELOAD_SCRIPT}</body></html>")
+
+    def test_inject_without_body(self):
+        self.assertEqual(inject_reload_script("<p>hi</p>"), f"<p>hi</p>{RELOAD_SCRIPT}")
+
+    def test_snapshot(self):
+        with TemporaryDirectory() as directory:
+            mkdir(join(directory, "blog"))
+            write(join(directory, "index.md"), "# Home")
+            write(join(directory, "blog", "post.md"), "# Post")
+            before = snapshot([directory])
+            self.assertEqual(sorted(before), [join(directory, "blog", "post.md"), join(directory, "index.md")])
+
+            write(join(directory, "blog", "post.md"), "# Edited post")
+            self.assertNotEqual(snapshot([directory]), before)
+
+    def test_snapshot_single_file(self):
+        with TemporaryDirectory() as directory:
+            path = join(directory, "template.html")
+            write(path, "{{ Content }}")
+            self.assertEqual(list(snapshot([path])), [path])
+
+    def test_snapshot_missing_paths(self):
+        # files that are gone, or never were, are left out instead of stopping the watcher
+        with TemporaryDirectory() as directory:
+            write(join(directory, "index.md"), "# Home")
+            symlink(join(directory, "missing.md"), join(directory, "broken.md"))
+            self.assertEqual(list(snapshot([directory, join(directory, "template.html")])), [join(directory, "index.md")])
+
+class TestWatchedPaths(unittest.TestCase):
+    def setUp(self):
+        self.cwd = getcwd()
+        self.tmp = TemporaryDirectory()
+        chdir(self.tmp.name)
+        mkdir("templates")
+        mkdir("partials")
+        write("template.html", "{{> partials/header.html }}{{ Content }}")
+        write("templates/blog.html", "{{> ../partials/footer.html }}{{ Content }}")
+        write("partials/header.html", "<header></header>")
+        write("partials/footer.html", "<footer></footer>")
+
+    def tearDown(self):
+        chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_templates_and_partials(self):
+        self.assertEqual(watched_paths(), ["./content", "./static", "./templates", "./template.html", "partials/footer.html", "partials/header.html"])
+
+    def test_broken_template(self):
+        # the partials of the templates that still load are watched
+        write("templates/blog.html", "{{> missing.html }}")
+        self.assertEqual(watched_paths()[4:], ["partials/header.html"])
+
+class TestDevRequestHandler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        mkdir(join(self.tmp.name, "blog"))
+        write(join(self.tmp.name, "index.html"), "<body>home</body>")
+        write(join(self.tmp.name, "blog", "index.css"), "body {}")
+        handler = partial(DevRequestHandler, LiveReload(), "/site/", directory=self.tmp.name)
+        self.server = HTTPServer(("localhost", 0), handler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://localhost:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def get(self, path):
+        with urlopen(self.url + path) as response:
+            return response.read().decode()
+
+    def test_served_at_base_path(self):
+        self.assertEqual(self.get("/site/"), f"<body>home{RELOAD_SCRIPT}</body>")
+        self.assertEqual(self.get("/site/blog/index.css"), "body {}")
+        # the root redirects to the site
+        self.assertEqual(self.get("/"), f"<body>home{RELOAD_SCRIPT}</body>")
+
+    def test_outside_base_path(self):
+        with self.assertRaises(HTTPError) as error:
+            self.get("/blog/index.css")
+        self.assertEqual(error.exception.code, 404)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import json
+from tempfile import TemporaryDirectory
+from contextlib import redirect_stdout
+from io import StringIO
+from os import makedirs
+from os.path import join, exists
+
+from manifest import Manifest
+from site_index import write_site_indexes, page_info, sitemap, feed
+
+
+class TestSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.public = join(self.tmp.name, "docs")
+        self.content = join(self.tmp.name, "content")
+        makedirs(join(self.public, "blog"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, pages, site_url="https://example.com"):
+        # pages are (output, metadata), like the page stage records them
+        manifest = Manifest(join(self.tmp.name, "manifest.json"))
+        manifest.load()
+        for path, metadata in pages:
+            manifest.record(join(self.public, path), [], {}, metadata)
+        manifest.rebuilt = []
+        with redirect_stdout(StringIO()):
+            write_site_indexes(manifest, self.public, self.content, "/", site_url)
+        manifest.save()
+        return manifest.rebuilt
+
+    def page(self, source, title, mtime=0):
+        return {"title": title, "excerpt": f"About {title}", "source": join(self.content, source), "mtime": mtime}
+
+    def test_writes_all_files(self):
+        rebuilt = self.build([
+            ("index.html", self.page("index.md", "Home")),
+            ("blog/post/index.html", self.page("blog/post/index.md", "Post & more")),
+        ])
+        self.assertEqual(sorted(rebuilt), sorted(join(self.public, path) for path in ["search.json", "sitemap.xml", "blog/feed.xml"]))
+
+        with open(join(self.public, "search.json")) as file:
+            self.assertEqual(json.load(file)[0], {"title": "Post & more", "url": "/blog/post/", "excerpt": "About Post & more"})
+        with open(join(self.public, "blog", "feed.xml")) as file:
+            text = file.read()
+        self.assertIn("<title>Home</title>", text)
+        self.assertIn("<title>Post &amp; more</title>", text)
+        self.assertIn("<link>https://example.com/blog/post/</link>", text)
+
+    def test_unchanged_files_are_kept(self):
+        pages = [("blog/post/index.html", self.page("blog/post/index.md", "Post"))]
+        self.build(pages)
+        self.assertEqual(self.build(pages), [])
+
+        # one new post changes the feed and the indexes
+        pages.append(("blog/other/index.html", self.page("blog/other/index.md", "Other")))
+        self.assertEqual(len(self.build(pages)), 3)
+
+    def test_no_site_url(self):
+        self.build([("blog/post/index.html", self.page("blog/post/index.md", "Post"))], site_url=None)
+        self.assertTrue(exists(join(self.public, "search.json")))
+        self.assertFalse(exists(join(self.public, "sitemap.xml")))
+        self.assertFalse(exists(join(self.public, "blog", "feed.xml")))
+
+    def test_page_url(self):
+        self.assertEqual(page_info("docs/index.html", {}, "./docs", "/site/")["url"], "/site/")
+        self.assertEqual(page_info("docs/blog/tom/index.html", {}, "./docs", "/site/")["url"], "/site/blog/tom/")
+        self.assertEqual(page_info("docs/about.html", {}, "./docs", "/")["url"], "/about.html")
+
+    def test_sitemap(self):
+        text = sitemap([{"url": "/b/", "mtime": 86400}, {"url": "/a/", "mtime": 0}], "https://example.com")
+        self.assertIn("<url><loc>https://example.com/a/</loc><lastmod>1970-01-01</lastmod></url>\n  <url><loc>https://example.com/b/</loc><lastmod>1970-01-02</lastmod></url>", text)
+
+    def test_feed_newest_first(self):
+        posts = [{"url": f"/blog/{i}/", "title": str(i), "excerpt": "", "mtime": i} for i in range(30)]
+        text = feed(posts, "Site", "https://example.com", "/", "https://example.com/blog/feed.xml")
+        self.assertEqual(text.count("<item>"), 20)
+        self.assertLess(text.index("<title>29</title>"), text.index("<title>28</title>"))
+        self.assertNotIn("<title>9</title>", text)
+
+if __name__ == "__main__":
+    unittest.main()
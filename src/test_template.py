@@ -0,0 +1,97 @@
+import unittest
+from tempfile import TemporaryDirectory
+from os import utime
+from os.path import join
+
+from template import Template, load_template, minify_markup
+from htmlnode import LeafNode, ParentNode
+from fixtures import write
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(template.render({"Title": "Hi", "Content": "<p>text</p>"}), "<title>Hi</title><article><p>text</p></article>")
+
+    def test_slots(self):
+        template = Template("<title>{{ Title }}</title><article>{{Content}}</article>")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(template.segments, ["<title>", "</title><article>", "</article>"])
+
+    def test_render_node(self):
+        template = Template("<article>{{ Content }}</article>")
+        node = ParentNode("p", [LeafNode("b", "bold")])
+        self.assertEqual(template.render({"Content": node}), "<article><p><b>bold</b></p></article>")
+
+    def test_no_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render({}), "<p>static</p>")
+
+    def test_missing_value(self):
+        template = Template("<title>{{ Title }}</title>")
+        with self.assertRaises(ValueError):
+            template.render({})
+
+    def test_base_path(self):
+        template = Template('<link href="/index.css" rel="stylesheet" /><img src="/a.png"><a href="https://boot.dev">{{ Content }}', "/site/")
+        self.assertEqual(template.render({"Content": 'href="/'}), '<link href="/site/index.css" rel="stylesheet" /><img src="/site/a.png"><a href="https://boot.dev">href="/')
+
+    def test_protocol_relative(self):
+        template = Template('<script src="//cdn.example.com/x.js"></script>', "/site/")
+        self.assertEqual(template.render({}), '<script src="//cdn.example.com/x.js"></script>')
+
+    def test_load_template_cached(self):
+        with TemporaryDirectory() as directory:
+            path = join(directory, "template.html")
+            with open(path, "w") as file:
+                file.write("<title>{{ Title }}</title>")
+            self.assertIs(load_template(path), load_template(path))
+            self.assertIsNot(load_template(path), load_template(path, "/site/"))
+
+    def test_minify(self):
+        source = "<html>\n  <head>\n    <title>{{ Title }}</title>\n  </head>\n  <body>\n    <p>Some   words</p> <b>x</b>\n    <pre>\n  keep\n</pre>\n    <!-- a\n  comment -->\n    {{ Content }}\n  </body>\n</html>\n"
+        template = Template(source, minify=True)
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(template.render({"Title": "t", "Content": "c"}), "<html><head><title>t</title></head><body><p>Some words</p> <b>x</b><pre>\n  keep\n</pre><!-- a\n  comment --> c </body></html>")
+
+    def test_minify_keeps_space_between_inline_elements(self):
+        # it would read HomeBlog on the page without it
+        nav = '<nav>\n  <a href="/">Home</a>\n  <a href="/blog">Blog</a>\n  <!-- more -->\n  <b>x</b>\n</nav>'
+        self.assertEqual(minify_markup(nav), '<nav><a href="/">Home</a> <a href="/blog">Blog</a> <!-- more --> <b>x</b></nav>')
+        self.assertEqual(minify_markup("<!doctype html>\n<p>a</p>\n<br>\n<i>b</i>\n"), "<!doctype html><p>a</p><br><i>b</i>")
+
+    def test_minify_markup_preserves_script(self):
+        self.assertEqual(minify_markup("<script>\n  let a  = 1\n</script>\n<STYLE> a  { } </STYLE>"), "<script>\n  let a  = 1\n</script><STYLE> a  { } </STYLE>")
+
+    def test_partials(self):
+        with TemporaryDirectory() as directory:
+            path = join(directory, "template.html")
+            write(path, "{{> partials/head.html }}<body>{{ Content }}</body>")
+            write(join(directory, "partials", "head.html"), '<head>{{> nav.html }}</head>')
+            write(join(directory, "partials", "nav.html"), '<a href="/">{{ Title }}</a>')
+
+            template = load_template(path, "/site/")
+            self.assertEqual(template.render({"Title": "t", "Content": "c"}), '<head><a href="/site/">t</a></head><body>c</body>')
+            self.assertEqual(template.dependencies, [join(directory, "partials", "head.html"), join(directory, "partials", "nav.html")])
+
+    def test_partial_change_reloads(self):
+        with TemporaryDirectory() as directory:
+            path = join(directory, "template.html")
+            partial = join(directory, "footer.html")
+            write(path, "{{ Content }}{{> footer.html }}")
+            write(partial, "old")
+            self.assertEqual(load_template(path).render({"Content": ""}), "old")
+            write(partial, "new")
+            # make sure the mtime moves even on filesystems with coarse timestamps
+            utime(partial, ns=(0, 0))
+            self.assertEqual(load_template(path).render({"Content": ""}), "new")
+
+    def test_recursive_partial(self):
+        with TemporaryDirectory() as directory:
+            path = join(directory, "template.html")
+            write(path, "{{> template.html }}")
+            with self.assertRaises(ValueError):
+                load_template(path)
+
+if __name__ == "__main__":
+    unittest.main()
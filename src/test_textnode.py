@@ -50,7 +50,9 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.TEXT)
         self.assertTrue(node == node2)
 
-    
+    def test_no_dict(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
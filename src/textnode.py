@@ -8,7 +8,10 @@ class TextType(Enum):
     LINK = "link"
     IMAGE = "image"
 
+# slots instead of a per instance __dict__, there is one of these for every bit of formatted text
 class TextNode():
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type